@@ -0,0 +1,21 @@
+from collections import deque
+
+
+def imap_bounded(pool, function, *iterables, window):
+    """Like pool.map, but keeps at most window tasks submitted and not yet consumed.
+
+    Results are yielded in submission order. The next task is only submitted once the caller
+    takes a result, so the parent holds about window results however many tasks there are.
+    Tasks still pending when the generator is closed are cancelled.
+    """
+    pending = deque()
+    try:
+        for args in zip(*iterables):
+            if len(pending) >= window:
+                yield pending.popleft().result()
+            pending.append(pool.submit(function, *args))
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,379 @@
+import json
+import os
+import re
+import tempfile
+from parser.edcdic_logger import logging as lg
+
+LAYOUT_VERSION = 1
+
+USAGE_ALIASES = {
+    'DISPLAY': 'DISPLAY',
+    'COMP': 'COMP', 'COMPUTATIONAL': 'COMP', 'COMP-4': 'COMP', 'COMPUTATIONAL-4': 'COMP',
+    'COMP-5': 'COMP', 'COMPUTATIONAL-5': 'COMP', 'BINARY': 'COMP',
+    'COMP-3': 'COMP-3', 'COMPUTATIONAL-3': 'COMP-3', 'PACKED-DECIMAL': 'COMP-3',
+    'COMP-1': 'COMP-1', 'COMPUTATIONAL-1': 'COMP-1',
+    'COMP-2': 'COMP-2', 'COMPUTATIONAL-2': 'COMP-2',
+}
+
+CLAUSE_KEYWORDS = {
+    'PIC', 'PICTURE', 'USAGE', 'OCCURS', 'REDEFINES', 'SIGN', 'LEADING', 'TRAILING', 'VALUE', 'VALUES',
+    'SYNC', 'SYNCHRONIZED', 'JUST', 'JUSTIFIED', 'BLANK', 'INDEXED', 'DEPENDING', 'EXTERNAL', 'GLOBAL',
+} | set(USAGE_ALIASES)
+
+TOKEN_PATTERN = re.compile(r"'[^']*'|\"[^\"]*\"|\S+")
+PIC_REPEAT_PATTERN = re.compile(r'(.)\((\d+)\)')
+
+
+class CopybookItem:
+    """One data description entry (group or elementary item) of a copybook."""
+
+    def __init__(self, level, name):
+        self.level = level
+        self.name = name
+        self.picture = None
+        self.usage = None
+        self.occurs = None
+        self.redefines = None
+        self.sign_position = None
+        self.sign_separate = False
+        self.children = []
+
+    @property
+    def is_group(self):
+        return self.picture is None and self.usage not in ('COMP-1', 'COMP-2')
+
+
+def clean_name(name):
+    return name.replace('-', '_').upper()
+
+
+FIXED_INDICATORS = ' *-/Dd$'
+
+
+def is_fixed_format(lines):
+    """True when every line fits fixed format: a numeric or blank sequence area (1-6) and a valid indicator (7).
+
+    Decided once per source, so a free-format line that merely starts with six spaces keeps column 7.
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        sequence = line[:6]
+        if not (sequence.isdigit() or not sequence.strip()):
+            return False
+        if len(line) > 6 and line[6] not in FIXED_INDICATORS:
+            return False
+    return True
+
+
+def source_text(text):
+    """Drops comment lines plus the sequence (1-6) and identification (73+) areas of fixed-format source.
+
+    In fixed format a '-' in column 7 continues the previous line: a continued literal resumes
+    after its opening quote (the previous line's literal runs to column 72), anything else is
+    appended to the previous line's last word.
+    """
+    source_lines = text.splitlines()
+    if not is_fixed_format(source_lines):
+        return '\n'.join(line for line in source_lines if not line.lstrip().startswith('*'))
+
+    lines = []
+    for line in source_lines:
+        if len(line) <= 6:
+            continue
+        indicator = line[6]
+        if indicator in '*/':
+            continue
+        area = line[7:72]
+        if indicator == '-' and lines:
+            continued = area.lstrip()
+            if continued[:1] in ('"', "'"):
+                lines[-1] = lines[-1].ljust(65) + continued[1:]
+            else:
+                lines[-1] = lines[-1].rstrip() + continued
+            continue
+        lines.append(area)
+    return '\n'.join(lines)
+
+
+def iter_statements(text):
+    """Splits copybook source into token lists, one per period-terminated entry."""
+    statement = []
+    for token in TOKEN_PATTERN.findall(source_text(text)):
+        if token == '.':
+            ends = True
+        elif token.endswith('.') and token[0] not in '\'"':
+            token, ends = token[:-1], True
+        else:
+            ends = False
+        if token and token != '.':
+            statement.append(token)
+        if ends and statement:
+            yield statement
+            statement = []
+    if statement:
+        yield statement
+
+
+def parse_entry(tokens):
+    """Builds a CopybookItem from the tokens of one entry; returns None for entries without storage."""
+    level = int(tokens[0])
+    if level == 88:
+        return None
+    if level == 66:
+        lg.warning(f"RENAMES entry {' '.join(tokens[1:2])} is not supported and was skipped")
+        return None
+
+    position = 1
+    if position < len(tokens) and tokens[position].upper() not in CLAUSE_KEYWORDS:
+        name = tokens[position]
+        position += 1
+    else:
+        name = 'FILLER'
+    item = CopybookItem(level, clean_name(name))
+
+    while position < len(tokens):
+        token = tokens[position].upper()
+        position += 1
+
+        if token in ('PIC', 'PICTURE'):
+            if tokens[position].upper() == 'IS':
+                position += 1
+            item.picture = tokens[position].upper()
+            position += 1
+
+        elif token == 'USAGE':
+            if tokens[position].upper() == 'IS':
+                position += 1
+            item.usage = USAGE_ALIASES[tokens[position].upper()]
+            position += 1
+
+        elif token in USAGE_ALIASES:
+            item.usage = USAGE_ALIASES[token]
+
+        elif token == 'OCCURS':
+            item.occurs = int(tokens[position])
+            position += 1
+            if position < len(tokens) and tokens[position].upper() == 'TO':
+                # OCCURS n TO m DEPENDING ON: lay out the maximum number of occurrences
+                item.occurs = int(tokens[position + 1])
+                position += 2
+            if position < len(tokens) and tokens[position].upper() == 'TIMES':
+                position += 1
+
+        elif token == 'DEPENDING':
+            if tokens[position].upper() == 'ON':
+                position += 1
+            position += 1
+
+        elif token == 'INDEXED':
+            if tokens[position].upper() == 'BY':
+                position += 1
+            while position < len(tokens) and tokens[position].upper() not in CLAUSE_KEYWORDS:
+                position += 1
+
+        elif token == 'REDEFINES':
+            item.redefines = clean_name(tokens[position])
+            position += 1
+
+        elif token in ('SIGN', 'LEADING', 'TRAILING'):
+            if token == 'SIGN':
+                if tokens[position].upper() == 'IS':
+                    position += 1
+                token = tokens[position].upper()
+                position += 1
+            item.sign_position = token.lower()
+            if position < len(tokens) and tokens[position].upper() == 'SEPARATE':
+                item.sign_separate = True
+                position += 1
+                if position < len(tokens) and tokens[position].upper() == 'CHARACTER':
+                    position += 1
+
+        elif token in ('VALUE', 'VALUES'):
+            break  # literals carry no layout information
+
+        elif token in ('SYNC', 'SYNCHRONIZED'):
+            lg.warning(f'SYNCHRONIZED on {item.name} is ignored; no slack bytes are added')
+
+    return item
+
+
+def parse_copybook(text):
+    """Parses copybook source into a list of top-level CopybookItems with their children attached."""
+    roots = []
+    stack = []
+    for tokens in iter_statements(text):
+        if not tokens[0].isdigit():
+            continue
+        item = parse_entry(tokens)
+        if item is None:
+            continue
+        while stack and stack[-1].level >= item.level:
+            stack.pop()
+        if stack and item.level != 77:
+            stack[-1].children.append(item)
+        else:
+            roots.append(item)
+        stack.append(item)
+    return roots
+
+
+def parse_picture(picture):
+    """Returns (numeric, digits, scale, signed, display_length) for a PIC string."""
+    expanded = PIC_REPEAT_PATTERN.sub(lambda match: match.group(1) * int(match.group(2)), picture)
+    signed = 'S' in expanded
+    numeric = set(expanded) <= set('9SVP')
+    digits = expanded.count('9')
+    scale = 0
+    if 'V' in expanded:
+        scale = expanded.split('V', 1)[1].count('9')
+    display_length = len(expanded) - expanded.count('S') - expanded.count('V') - expanded.count('P')
+    return numeric, digits, scale, signed, display_length
+
+
+def binary_length(digits):
+    if digits <= 4:
+        return 2
+    if digits <= 9:
+        return 4
+    return 8
+
+
+def elementary_field(item, usage, sign_position, sign_separate):
+    """Decode-schema field (without name/offset) for an elementary item."""
+    if usage in ('COMP-1', 'COMP-2'):
+        return {'type': usage, 'length': 4 if usage == 'COMP-1' else 8}
+
+    numeric, digits, scale, signed, display_length = parse_picture(item.picture)
+
+    if not numeric:
+        return {'type': 'CHAR', 'length': display_length}
+
+    if usage == 'COMP-3':
+        field = {'type': 'COMP-3', 'length': digits // 2 + 1}
+    elif usage == 'COMP':
+        field = {'type': 'COMP', 'length': binary_length(digits)}
+        if not signed:
+            field['signed'] = False
+        if scale:
+            lg.warning(f'Scale {scale} of binary field {item.name} is not applied; values are unscaled integers')
+            return field
+    elif signed and sign_separate:
+        lg.warning(f'SIGN SEPARATE field {item.name} is decoded as CHAR')
+        return {'type': 'CHAR', 'length': display_length + 1}
+    else:
+        field = {'type': 'ZONED', 'length': digits}
+        if signed and sign_position == 'leading':
+            field['sign_position'] = 'leading'
+
+    if scale:
+        field['scale'] = scale
+    return field
+
+
+class CopybookLayout:
+    """Computes offsets and lengths for a parsed copybook and flattens it into decode-schema fields."""
+
+    def __init__(self, roots):
+        self.roots = roots
+
+    def item_size(self, item, usage=None, sign=(None, False)):
+        """Size in bytes of one occurrence of item."""
+        usage = item.usage or usage
+        sign = (item.sign_position, item.sign_separate) if item.sign_position else sign
+        if not item.is_group:
+            return elementary_field(item, usage, *sign)['length']
+
+        size = 0
+        starts = {}
+        position = 0
+        for child in item.children:
+            start = starts[child.redefines] if child.redefines else position
+            starts[child.name] = start
+            end = start + self.item_size(child, usage, sign) * (child.occurs or 1)
+            position = max(position, end)
+            size = max(size, end)
+        return size
+
+    def fields(self):
+        fields = []
+        # Several 01 records in one copybook describe the same storage, so each starts at offset 0
+        for root in self.roots:
+            self._emit(root, 0, '', None, (None, False), fields)
+        return fields
+
+    def _emit(self, item, offset, suffix, usage, sign, fields):
+        usage = item.usage or usage
+        sign = (item.sign_position, item.sign_separate) if item.sign_position else sign
+        occurrence_size = self.item_size(item, usage, sign)
+
+        for occurrence in range(item.occurs or 1):
+            occurrence_suffix = f'{suffix}_{occurrence + 1}' if item.occurs else suffix
+            occurrence_offset = offset + occurrence * occurrence_size
+
+            if not item.is_group:
+                field = elementary_field(item, usage, *sign)
+                name = item.name + occurrence_suffix if item.name != 'FILLER' else 'FILLER'
+                if item.name == 'FILLER':
+                    field['type'] = 'FILLER'
+                fields.append({'name': name, **field, 'offset': occurrence_offset})
+                continue
+
+            starts = {}
+            position = occurrence_offset
+            for child in item.children:
+                start = starts[child.redefines] if child.redefines else position
+                starts[child.name] = start
+                self._emit(child, start, occurrence_suffix, usage, sign, fields)
+                position = max(position, start + self.item_size(child, usage, sign) * (child.occurs or 1))
+
+
+def compile_copybook(text):
+    """Compiles copybook source into the decoder's schema: a list of name/type/length/offset fields.
+
+    OCCURS items are flattened to NAME_1, NAME_2, ... (nested OCCURS to NAME_1_2); REDEFINES
+    items share the offset of the item they redefine; FILLER keeps its bytes as type FILLER.
+    """
+    return CopybookLayout(parse_copybook(text)).fields()
+
+
+def compile_copybook_file(copybook_path, encoding='utf-8'):
+    with open(copybook_path, 'r', encoding=encoding) as f:
+        return compile_copybook(f.read())
+
+
+def save_layout(schema, layout_path):
+    # A unique temp file per writer, so processes compiling at the same time never share one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(layout_path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'version': LAYOUT_VERSION, 'fields': schema}, f, indent=1)
+        os.replace(tmp_path, layout_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_layout(layout_path):
+    with open(layout_path, 'r', encoding='utf-8') as f:
+        layout = json.load(f)
+    if layout.get('version') != LAYOUT_VERSION:
+        raise ValueError(f'{layout_path} has layout version {layout.get("version")}, expected {LAYOUT_VERSION}')
+    return layout['fields']
+
+
+def load_or_compile_layout(copybook_path, layout_path=None):
+    """Returns the precompiled layout for a copybook, compiling and saving it only when missing or stale."""
+    layout_path = layout_path or copybook_path + '.layout.json'
+    if os.path.exists(layout_path) and os.path.getmtime(layout_path) >= os.path.getmtime(copybook_path):
+        try:
+            return load_layout(layout_path)
+        except (OSError, ValueError, KeyError) as e:
+            lg.warning(f'Recompiling {copybook_path}, unreadable layout {layout_path}: {e}')
+
+    schema = compile_copybook_file(copybook_path)
+    try:
+        save_layout(schema, layout_path)
+    except OSError as e:
+        lg.warning(f'Could not save compiled layout {layout_path}: {e}')
+    return schema
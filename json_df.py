@@ -1,11 +1,24 @@
+import numpy as np
+from xml_columnar import ColumnarBuilder, build_tables
+
+META_COLUMNS = ['CreDtTm', 'NbOfTxs', 'TxId', 'State']
+
+
 def convert_to_dataframe(data):
-    """Converts structured JSON into a Pandas DataFrame."""
-    
-    # Ensure 'AuditTrailEntry' exists in every record
-    for item in data:
-        if "AuditTrailEntry" not in item:
-            item["AuditTrailEntry"] = [{}]  # Use [{}] instead of []
-
-    df = pd.json_normalize(data, record_path=['AuditTrailEntry'], meta=['CreDtTm', 'NbOfTxs', 'TxId', 'State'], errors='ignore')
-    
-    return df
+    """Converts structured JSON into a Pandas DataFrame: one row per AuditTrailEntry, plus the record's meta columns.
+
+    Records without an AuditTrailEntry key still get one row (an empty list gets none), missing
+    values are NaN and nested entry dicts become dotted columns, as with json_normalize. The
+    records themselves are not modified.
+    """
+    builder = ColumnarBuilder(child_key='AuditTrailEntry', parent_keys=META_COLUMNS, keep_empty=True, missing=np.nan)
+    return builder.add_records(data).to_pandas()[1]
+
+
+def xml_to_tables(xml_file_path, flattener, as_arrow=False, column_types=None):
+    """Flattens an XML file straight into (parent, AuditTrail child) tables without building a list of records.
+
+    column_types (see xml_types) turns counts, amounts and timestamps into typed columns.
+    """
+    return build_tables(flattener.iter_file(xml_file_path), parent_keys=META_COLUMNS, as_arrow=as_arrow,
+                        keep_empty=True, column_types=column_types)
@@ -12,31 +12,16 @@ if src_blob.exists():
 
 
 """ With this logic:
-Download JSON in memory
+Stream the JSON array from the source blob
 
-Parse it
+Parse it one element at a time
 
-Transform it into NDJSON
+Write each element as an NDJSON line to the target blob"""
 
-Upload transformed NDJSON to target"""
+from json_stream import transcode_blob
 
 if src_blob.exists():
-    # Step 1: Download JSON data as bytes
-    json_bytes = src_blob.download_as_bytes(retry=self.retry_strategy)
-    json_obj = json.loads(json_bytes)
+    # Memory stays bounded by the largest record instead of the whole file
+    record_count = transcode_blob(src_blob, dst_blob, retry=self.retry_strategy)
 
-    # Step 2: Transform to NDJSON
-    if isinstance(json_obj, list):
-        ndjson_lines = [json.dumps(item) for item in json_obj]
-    elif isinstance(json_obj, dict):
-        ndjson_lines = [json.dumps(json_obj)]
-    else:
-        logger.error(f"Unexpected JSON format in file `{src_blob.name}`")
-        raise ValueError("Invalid JSON format")
-
-    ndjson_data = "\n".join(ndjson_lines)
-
-    # Step 3: Upload NDJSON to target
-    dst_blob.upload_from_string(ndjson_data, content_type='application/x-ndjson')
-
-    logger.debug(f"NDJSON transformed file `{src_blob.name}` uploaded to `{dst_blob.name}` in bucket `{self.job_params.gcs_tgt_bckt_nm}`")
+    logger.debug(f"NDJSON transformed file `{src_blob.name}` ({record_count} records) uploaded to `{dst_blob.name}` in bucket `{self.job_params.gcs_tgt_bckt_nm}`")
@@ -1,7 +1,10 @@
+from json_stream import transcode_blob
+
+
 def copy_file_to_gcs(self, capture_file: FileLookupDc, checksum_metd) -> FileLookupDc:
     """
     Method to copy file(s) from Source bucket+folder to target bucket+folder.
-    If JSON, transforms to NDJSON in-memory and writes to target GCS.
+    If JSON, streams it to NDJSON in the target GCS blob one array element at a time.
     Args:
         checksum_metd:
         capture_file:
@@ -28,16 +31,9 @@ def copy_file_to_gcs(self, capture_file: FileLookupDc, checksum_metd) -> FileLoo
         # Handle JSON to NDJSON transformation if needed
         if src_blob.exists() and capture_file.file_name.endswith(".json"):
             logger.debug(f"Transforming JSON to NDJSON for file: {capture_file.file_name}")
-            json_data = json.loads(src_blob.download_as_text())
-            # Open GCS write stream to write NDJSON
-            with dst_blob.open(mode="w", content_type="application/x-ndjson") as f:
-                if isinstance(json_data, list):
-                    for obj in json_data:
-                        f.write(json.dumps(obj) + "\n")
-                elif isinstance(json_data, dict):
-                    f.write(json.dumps(json_data) + "\n")
-                else:
-                    raise ValueError("Unsupported JSON format for NDJSON conversion")
+            # Parses the source incrementally, so memory is bounded by the largest record
+            record_count = transcode_blob(src_blob, dst_blob, retry=self.retry_strategy)
+            logger.debug(f"{record_count} NDJSON records written to {dst_blob.name}")
         elif src_blob.exists():
             # Binary copy for non-JSON files
             token = None
@@ -0,0 +1,134 @@
+import codecs
+import json
+import logging
+import re
+
+CHUNK_SIZE = 8 * 1024 * 1024
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+# What may follow an array element; anything else after a parsed number means it was cut ('12' of '12.5')
+VALUE_END = ' \t\n\r,]'
+
+
+class _TextStream:
+    """Text buffer over a binary stream, decoded incrementally so UTF-8 characters split across chunks survive."""
+
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self, size=None):
+        """Appends at least one more chunk (or size bytes); returns False at end of stream."""
+        if self.eof:
+            return False
+        # Drop what has been consumed so the buffer only holds the record being parsed
+        if self.pos:
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        data = self.stream.read(max(size or 0, self.chunk_size))
+        self.eof = not data
+        self.text += self.decoder.decode(data, final=self.eof)
+        return True
+
+    def skip_whitespace(self):
+        """Moves past whitespace; returns the next character, or '' at end of stream."""
+        while True:
+            self.pos = WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.read_more():
+                return ''
+
+
+def _decode_value(text_stream, decoder):
+    # A value is complete once it parses and is followed by a separator already in the buffer;
+    # each retry reads at least as much as is buffered so a large record is re-parsed O(log n) times
+    while True:
+        try:
+            value, end = decoder.raw_decode(text_stream.text, text_stream.pos)
+            if text_stream.eof or (end < len(text_stream.text) and text_stream.text[end] in VALUE_END):
+                text_stream.pos = end
+                return value
+        except json.JSONDecodeError:
+            if text_stream.eof:
+                raise
+        text_stream.read_more(len(text_stream.text) - text_stream.pos)
+
+
+def iter_json_array(stream, chunk_size=CHUNK_SIZE):
+    """Yields the elements of a top-level JSON array read from a binary stream, one at a time.
+
+    Only the current element and one chunk are held in memory. A top-level object is yielded
+    as a single element; any other top-level value raises ValueError.
+    """
+    text_stream = _TextStream(stream, chunk_size)
+    decoder = json.JSONDecoder()
+
+    first = text_stream.skip_whitespace()
+    if first == '{':
+        yield _decode_value(text_stream, decoder)
+    elif first == '[':
+        text_stream.pos += 1
+        if text_stream.skip_whitespace() == ']':
+            text_stream.pos += 1
+        else:
+            while True:
+                yield _decode_value(text_stream, decoder)
+                separator = text_stream.skip_whitespace()
+                text_stream.pos += 1
+                if separator == ']':
+                    break
+                if separator != ',':
+                    raise ValueError(f"Expected ',' or ']' in JSON array, found {separator or 'end of data'!r}")
+                if text_stream.skip_whitespace() == ']':
+                    raise ValueError('Trailing comma in JSON array')
+    else:
+        raise ValueError('Unsupported JSON format for NDJSON conversion')
+
+    if text_stream.skip_whitespace():
+        raise ValueError('Extra data after the top-level JSON value')
+
+
+def transcode_json_to_ndjson(src, dst, chunk_size=CHUNK_SIZE):
+    """Copies a JSON array (binary stream src) to NDJSON (text stream dst), one element per line; returns the count."""
+    count = 0
+    for record in iter_json_array(src, chunk_size):
+        dst.write(json.dumps(record) + '\n')
+        count += 1
+    return count
+
+
+def _abort_upload(dst, dst_blob):
+    # Closing the writer would finalize a truncated object: cancel the resumable upload instead,
+    # or, with a client whose writer cannot, let it finish and delete the object
+    writer = getattr(dst, 'buffer', dst)  # text mode wraps the BlobWriter
+    try:
+        if hasattr(writer, 'terminate'):
+            writer.terminate()
+        else:
+            dst.close()
+            dst_blob.delete()
+    except Exception as e:
+        logging.warning(f"Could not discard the partial upload of {dst_blob.name}: {e}")
+
+
+def transcode_blob(src_blob, dst_blob, chunk_size=CHUNK_SIZE, retry=None):
+    """Streams a JSON-array GCS blob into an NDJSON blob; memory is bounded by the largest record, not the file.
+
+    If reading or parsing fails, the upload is aborted so no truncated dst_blob is left behind.
+    """
+    options = {} if retry is None else {'retry': retry}
+    with src_blob.open('rb', chunk_size=chunk_size, **options) as src:
+        dst = dst_blob.open('w', content_type=NDJSON_CONTENT_TYPE, **options)
+        try:
+            count = transcode_json_to_ndjson(src, dst, chunk_size)
+        except BaseException:
+            _abort_upload(dst, dst_blob)
+            raise
+        dst.close()
+    return count
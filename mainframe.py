@@ -1,7 +1,11 @@
 import codecs
 import os
-from parser.unpacker import unpack_comp, unpack_comp3
+from parser.unpacker import unpack_comp
 from parser.edcdic_logger import logging as lg
+from mainframe_columnar import decode_columns, decode_dataframe
+from mainframe_diagnostics import DecodeDiagnostics
+from mainframe_numeric import unpack_hex_float, unpack_packed, unpack_unsigned, unpack_zoned
+from mainframe_plan import field_offsets, schema_record_size
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,62 +13,103 @@ logger = logging.getLogger(__name__)
 class EBCDIC_Decoder:
 
     @classmethod
-    def parse_dat_file(cls, file_path, schema):
-        results = []
+    def parse_dat_file(cls, file_path, schema, diagnostics=None):
+        return list(cls.iter_dat_file(file_path, schema, diagnostics))
 
+    @classmethod
+    def iter_dat_batches(cls, file_path, schema, batch_size=10000, diagnostics=None):
+        batch = []
+        for record in cls.iter_dat_file(file_path, schema, diagnostics):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @classmethod
+    def iter_dat_file(cls, file_path, schema, diagnostics=None, report=True):
         # Calculate total size of one record
-        record_size = sum(field["length"] for field in schema)
-
-        with open(file_path, 'rb') as f:
-            while True:
-                record_bytes = f.read(record_size)
-                if not record_bytes or len(record_bytes) < record_size:
-                    break  # End of file or incomplete record
-
-                record = {}
-                byte_pointer = 0  # Reset for each record
-
-                lg.info(f'Reading record of length: {len(record_bytes)}')
-                lg.info(f'Record bytes: {record_bytes}')
-
-                for field in schema:
-                    field_name = field['name']
-                    field_type = field['type']
-                    field_length = field['length']
-                    field_data = record_bytes[byte_pointer:byte_pointer+field_length]
-                    actual_length = len(field_data)
-
-                    lg.info(f'Starting Pointer: {byte_pointer}')
-                    byte_pointer += field_length
-                    lg.info(f'End Pointer: {byte_pointer}')
-
-                    try:
-                        if field_type == 'CHAR':
-                            if actual_length < field_length:
-                                decoded_data = ' ' * (field_length - actual_length)
+        record_size = schema_record_size(schema)
+
+        if diagnostics is None:
+            diagnostics = DecodeDiagnostics.from_env(label=os.path.basename(file_path))
+        tracing = diagnostics.tracing
+        record_number = 0
+
+        try:
+            with open(file_path, 'rb') as f:
+                while True:
+                    record_bytes = f.read(record_size)
+                    if not record_bytes or len(record_bytes) < record_size:
+                        if record_bytes:
+                            diagnostics.short_read(len(record_bytes), record_size)
+                        break  # End of file or incomplete record
+
+                    record = {}
+
+                    for field, byte_pointer in field_offsets(schema):
+                        field_name = field['name']
+                        field_type = field['type']
+                        field_length = field['length']
+                        if field_type == 'FILLER':
+                            continue
+                        field_data = record_bytes[byte_pointer:byte_pointer+field_length]
+                        actual_length = len(field_data)
+
+                        try:
+                            if field_type == 'CHAR':
+                                if actual_length < field_length:
+                                    diagnostics.short_read(actual_length, field_length, field_name, field_type)
+                                    decoded_data = ' ' * (field_length - actual_length)
+                                    record[field_name] = decoded_data
+                                else:
+                                    decoded_data = codecs.decode(field_data, 'cp500').strip()
+                                    record[field_name] = decoded_data
+
+                            elif field_type == 'COMP':
+                                if field.get('signed', True):
+                                    decoded_data = unpack_comp(field_data, field_length)
+                                else:
+                                    decoded_data = unpack_unsigned(field_data)
                                 record[field_name] = decoded_data
-                            else:
-                                decoded_data = codecs.decode(field_data, 'cp500').strip()
+
+                            elif field_type == 'COMP-3':
+                                decoded_data = unpack_packed(field_data, field.get('scale', 0))
                                 record[field_name] = decoded_data
 
-                        elif field_type == 'COMP':
-                            decoded_data = unpack_comp(field_data, field_length)
-                            record[field_name] = decoded_data
+                            elif field_type == 'ZONED':
+                                decoded_data = unpack_zoned(field_data, field.get('scale', 0),
+                                                            sign_position=field.get('sign_position', 'trailing'))
+                                record[field_name] = decoded_data
 
-                        elif field_type == 'COMP-3':
-                            decoded_data = unpack_comp3(field_data, field_length)
-                            record[field_name] = decoded_data
+                            elif field_type in ('COMP-1', 'COMP-2'):
+                                decoded_data = unpack_hex_float(field_data)
+                                record[field_name] = decoded_data
 
-                        lg.info(f'Raw data: {field_data} || Decoded: {decoded_data}')
-                        lg.info(f"Actual Length: {actual_length}, Expected Length: {field_length}\n")
+                            else:
+                                raise ValueError(f'Unsupported field type {field_type}')
 
-                    except Exception as e:
-                        lg.error(f"Error decoding {field_name} of type {field_type}: {e}")
-                        record[field_name] = None  # or a default value like 0
+                        except Exception as e:
+                            diagnostics.field_error(field_name, field_type, e)
+                            record[field_name] = None  # or a default value like 0
 
-                results.append(record)
+                    if tracing and diagnostics.should_trace(record_number):
+                        diagnostics.trace_record(record_number, record_bytes, record)
+                    record_number += 1
 
-        return results
+                    yield record
+        finally:
+            diagnostics.records += record_number
+            if report:
+                diagnostics.report()
+
+    @classmethod
+    def parse_dat_file_columnar(cls, file_path, schema, as_dataframe=True):
+        # Same output values as parse_dat_file (CHAR stripped, scaled Decimals), decoded column by column
+        if as_dataframe:
+            return decode_dataframe(file_path, schema, strip=True, numeric_output='decimal')
+        return decode_columns(file_path, schema, strip=True, numeric_output='decimal')
 
     @classmethod
     def _get_header_src_count(cls, file_path):
@@ -0,0 +1,260 @@
+"""Throughput benchmarks for the EBCDIC decoders on synthetic DAT files.
+
+Usage:
+    python mainframe_bench.py --schema schema.json --size-mb 64 --save-baseline
+    python mainframe_bench.py --schema schema.json --size-mb 64 --check
+"""
+import argparse
+import codecs
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+from collections import deque
+from parser.edcdic_logger import logging as lg
+from mainframe import EBCDIC_Decoder
+from mainframe_diagnostics import DecodeDiagnostics
+from mainframe_init import EBCDICDecoder
+from mainframe_numeric import MAX_ZONED_INT64_LENGTH
+from mainframe_plan import field_offsets, schema_record_size
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mainframe_bench_baseline.json')
+
+# Distinct records generated before the pool is repeated to reach the requested size
+RECORD_POOL_SIZE = 4096
+
+TEXT_CHARACTERS = string.ascii_letters + string.digits + ' -./'
+
+
+def _packed(value, length):
+    digits = str(abs(value)).rjust(2 * length - 1, '0')
+    return bytes.fromhex(digits + ('D' if value < 0 else 'C'))
+
+
+def _zoned(value, length, sign_position='trailing'):
+    data = bytearray(0xF0 | int(digit) for digit in str(abs(value)).rjust(length, '0'))
+    sign_index = -1 if sign_position == 'trailing' else 0
+    data[sign_index] = (0xD0 if value < 0 else 0xC0) | (data[sign_index] & 0x0F)
+    return bytes(data)
+
+
+def _hex_float(value, length):
+    if value == 0:
+        return bytes(length)
+    fraction_bits = 8 * length - 8
+    sign = 0x80 if value < 0 else 0
+    magnitude = abs(value)
+    exponent = 64
+    while magnitude >= 1:
+        magnitude /= 16
+        exponent += 1
+    while magnitude < 1 / 16:
+        magnitude *= 16
+        exponent -= 1
+    fraction = min(int(magnitude * (1 << fraction_bits)), (1 << fraction_bits) - 1)
+    return ((sign | exponent) << fraction_bits | fraction).to_bytes(length, 'big')
+
+
+def synthetic_field(field, rng):
+    """Random but valid bytes for one schema field."""
+    field_type = field['type']
+    field_length = field['length']
+    if field_type in ('CHAR', 'FILLER'):
+        text = ''.join(rng.choice(TEXT_CHARACTERS) for _ in range(field_length))
+        return codecs.encode(text, 'cp500')
+    if field_type == 'COMP':
+        if field.get('signed', True):
+            value = rng.randint(-(1 << (8 * field_length - 1)), (1 << (8 * field_length - 1)) - 1)
+        else:
+            value = rng.randint(0, (1 << (8 * field_length)) - 1)
+        return value.to_bytes(field_length, 'big', signed=field.get('signed', True))
+    if field_type == 'COMP-3':
+        limit = 10 ** (2 * field_length - 1) - 1
+        return _packed(rng.randint(-limit, limit), field_length)
+    if field_type == 'ZONED':
+        limit = 10 ** field_length - 1
+        return _zoned(rng.randint(-limit, limit), field_length, field.get('sign_position', 'trailing'))
+    if field_type in ('COMP-1', 'COMP-2'):
+        return _hex_float(rng.uniform(-1e6, 1e6), field_length)
+    raise ValueError(f"Unsupported field type {field_type} for field {field['name']}")
+
+
+def synthetic_record(schema, rng):
+    record = bytearray(b'\x40' * schema_record_size(schema))
+    for field, offset in field_offsets(schema):
+        record[offset:offset + field['length']] = synthetic_field(field, rng)
+    return bytes(record)
+
+
+def generate_dat_file(file_path, schema, size_mb=None, record_count=None, seed=0):
+    """Writes a synthetic EBCDIC DAT file of record_count records (or about size_mb megabytes).
+
+    Returns the number of records written.
+    """
+    record_size = schema_record_size(schema)
+    if record_count is None:
+        record_count = max(1, int((size_mb or 1) * 1024 * 1024) // record_size)
+
+    rng = random.Random(seed)
+    pool = b''.join(synthetic_record(schema, rng) for _ in range(min(RECORD_POOL_SIZE, record_count)))
+    pool_records = len(pool) // record_size
+
+    with open(file_path, 'wb') as f:
+        remaining = record_count
+        while remaining:
+            count = min(remaining, pool_records)
+            f.write(pool[:count * record_size])
+            remaining -= count
+    return record_count
+
+
+def _consume(records):
+    deque(records, maxlen=0)
+
+
+def _bench_parse(file_path, schema):
+    decoder = EBCDICDecoder(file_path, schema)
+    return lambda: _consume(decoder.iter_records(report=False))
+
+
+def _bench_parse_columns(file_path, schema):
+    decoder = EBCDICDecoder(file_path, schema)
+    return lambda: decoder.parse_columns(as_dataframe=False)
+
+
+def _bench_parse_dat_file(file_path, schema):
+    diagnostics = DecodeDiagnostics()
+    return lambda: _consume(EBCDIC_Decoder.iter_dat_file(file_path, schema, diagnostics, report=False))
+
+
+# Each entry does its setup (decoder, plan, diagnostics) and returns the call that is timed
+DECODERS = {
+    'EBCDICDecoder.parse': _bench_parse,
+    'EBCDICDecoder.parse_columns': _bench_parse_columns,
+    'EBCDIC_Decoder.parse_dat_file': _bench_parse_dat_file,
+}
+
+
+def columnar_supported(schema):
+    """Whether the columnar decoder can handle every field (binary COMP and ZONED must fit in int64)."""
+    for field in schema:
+        length = field['length']
+        if field['type'] == 'COMP' and (length > 8 or (length == 8 and not field.get('signed', True))):
+            return False
+        if field['type'] == 'ZONED' and length > MAX_ZONED_INT64_LENGTH:
+            return False
+    return True
+
+
+def time_decoder(setup, file_path, schema, repeat=3):
+    """Best wall time of the decode alone; setup runs outside the timed region."""
+    best = float('inf')
+    for _ in range(repeat):
+        decode = setup(file_path, schema)
+        start = time.perf_counter()
+        decode()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def field_type_schemas(schema):
+    """The full schema plus one sub-schema per field type, so throughput can be reported per type."""
+    schemas = {'ALL': schema}
+    for field in schema:
+        if field['type'] != 'FILLER':
+            schemas.setdefault(field['type'], [])
+    for field_type in list(schemas):
+        if field_type != 'ALL':
+            schemas[field_type] = [
+                {key: value for key, value in field.items() if key != 'offset'}
+                for field in schema if field['type'] == field_type
+            ]
+    return schemas
+
+
+def run_benchmarks(schema, size_mb=16, repeat=3, decoders=None, work_dir=None):
+    """Times each decoder on a synthetic file per field type; returns {'decoder[type]': metrics}."""
+    results = {}
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        for field_type, type_schema in field_type_schemas(schema).items():
+            file_path = os.path.join(tmp_dir, f"bench_{field_type.replace('-', '')}.DAT")
+            record_count = generate_dat_file(file_path, type_schema, size_mb=size_mb)
+            megabytes = os.path.getsize(file_path) / (1024 * 1024)
+
+            for name in decoders or DECODERS:
+                if name == 'EBCDICDecoder.parse_columns' and not columnar_supported(type_schema):
+                    lg.info(f'Skipping {name}[{field_type}]: a field is too wide for the columnar decoder')
+                    continue
+                seconds = time_decoder(DECODERS[name], file_path, type_schema, repeat)
+                results[f'{name}[{field_type}]'] = {
+                    'records_per_sec': record_count / seconds,
+                    'mb_per_sec': megabytes / seconds,
+                    'seconds': seconds,
+                    'records': record_count,
+                }
+    return results
+
+
+def load_baseline(baseline_path=BASELINE_PATH):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(results, baseline_path=BASELINE_PATH):
+    with open(baseline_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def find_regressions(results, baseline, tolerance=0.15):
+    """Benchmarks whose records/sec fell more than `tolerance` below the stored baseline."""
+    regressions = {}
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        expected = baseline[name]['records_per_sec']
+        if metrics['records_per_sec'] < expected * (1 - tolerance):
+            regressions[name] = (expected, metrics['records_per_sec'])
+    return regressions
+
+
+def print_results(results):
+    print(f"{'benchmark':<50} {'records/s':>14} {'MB/s':>10}")
+    for name, metrics in sorted(results.items()):
+        print(f"{name:<50} {metrics['records_per_sec']:>14,.0f} {metrics['mb_per_sec']:>10.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the EBCDIC decoders on synthetic DAT files.')
+    parser.add_argument('--schema', required=True, help='Schema JSON (name/type/length list)')
+    parser.add_argument('--size-mb', type=float, default=16, help='Size of each synthetic file')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per benchmark; the fastest is kept')
+    parser.add_argument('--decoder', action='append', choices=sorted(DECODERS), help='Limit to these decoders')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--check', action='store_true', help='Fail when slower than the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    with open(args.schema, 'r', encoding='utf-8') as f:
+        schema = json.load(f)
+
+    results = run_benchmarks(schema, args.size_mb, args.repeat, args.decoder)
+    print_results(results)
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        lg.info(f'Baseline saved to {args.baseline}')
+
+    if args.check:
+        regressions = find_regressions(results, load_baseline(args.baseline), args.tolerance)
+        for name, (expected, actual) in regressions.items():
+            print(f'REGRESSION {name}: {actual:,.0f} records/s vs baseline {expected:,.0f}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+import codecs
+import os
+
+import numpy as np
+import pandas as pd
+from parser.edcdic_logger import logging as lg
+from mainframe_plan import field_offsets, schema_record_size
+from mainframe_numeric import decode_hex_float_column, decode_packed_column, decode_zoned_column
+
+# cp500 covers exactly the Latin-1 repertoire, so a 256 entry byte table turns
+# EBCDIC text into Latin-1 bytes that numpy can decode for a whole column at once.
+CP500_TO_LATIN1 = np.frombuffer(codecs.decode(bytes(range(256)), 'cp500').encode('latin-1'), dtype=np.uint8)
+
+# COMP fields with a native width are read straight from the file as big-endian ints (signed, unsigned).
+COMP_FORMATS = {2: ('>i2', '>u2'), 4: ('>i4', '>u4'), 8: ('>i8', '>u8')}
+
+# IBM hex floats are read as raw big-endian words and converted with bit arithmetic.
+HEX_FLOAT_FORMATS = {'COMP-1': '>u4', 'COMP-2': '>u8'}
+
+
+def build_dtype(schema):
+    """Compiles the JSON schema into a NumPy structured dtype covering one record."""
+    names, formats, offsets = [], [], []
+    for field, offset in field_offsets(schema):
+        field_type = field['type']
+        field_length = field['length']
+        if field_type == 'FILLER':
+            continue
+        if field_type == 'COMP' and field_length in COMP_FORMATS:
+            formats.append(COMP_FORMATS[field_length][0 if field.get('signed', True) else 1])
+        elif field_type in HEX_FLOAT_FORMATS:
+            formats.append(HEX_FLOAT_FORMATS[field_type])
+        else:
+            formats.append(('u1', (field_length,)))
+        names.append(field['name'])
+        offsets.append(offset)
+    return np.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': schema_record_size(schema)})
+
+
+def read_records(file_path, dtype, use_memmap=True):
+    """Maps (or reads) every complete record of the DAT file into a structured array."""
+    record_count = os.path.getsize(file_path) // dtype.itemsize
+    if record_count == 0:
+        return np.empty(0, dtype=dtype)
+    if use_memmap:
+        return np.memmap(file_path, dtype=dtype, mode='r', shape=(record_count,))
+    return np.fromfile(file_path, dtype=dtype, count=record_count)
+
+
+def decode_char_column(raw, strip=False):
+    """Decodes an (n, length) block of cp500 bytes into a string column.
+
+    NumPy strings drop trailing NULs, so when some values end in LOW-VALUES (0x00) the column
+    becomes an object array and those values are decoded one by one, keeping their NULs as
+    the row decoders do.
+    """
+    length = raw.shape[1]
+    latin1 = np.ascontiguousarray(CP500_TO_LATIN1[raw])
+    values = np.char.decode(latin1.view(f'S{length}').ravel(), 'latin-1')
+    if strip:
+        values = np.char.strip(values)
+    nul_rows = np.flatnonzero(latin1[:, -1] == 0) if length else ()
+    if len(nul_rows):
+        values = values.astype(object)
+        for row in nul_rows:
+            value = latin1[row].tobytes().decode('latin-1')
+            values[row] = value.strip() if strip else value
+    return values
+
+
+def decode_comp_column(raw, signed=True):
+    """Decodes a column of big-endian binary (COMP) values into int64 (uint64 for unsigned 8 byte fields)."""
+    if raw.ndim == 1:
+        return raw.astype(np.int64 if signed or raw.dtype.itemsize < 8 else np.uint64)
+
+    length = raw.shape[1]
+    if length > 8 or (length == 8 and not signed):
+        raise ValueError(f'COMP field of {length} bytes does not fit in int64')
+    values = np.zeros(raw.shape[0], dtype=np.int64)
+    for i in range(length):
+        values = (values << 8) | raw[:, i]
+    # Sign-extend widths that have no native big-endian dtype (e.g. 3 bytes)
+    if signed and length < 8:
+        sign_bit = np.int64(1) << (8 * length - 1)
+        values = np.where(values & sign_bit, values - (sign_bit << 1), values)
+    return values
+
+
+def decode_columns(file_path, schema, strip=False, use_memmap=True, numeric_output='int64'):
+    """Decodes a fixed-length DAT file column by column.
+
+    Returns a dict of field name to NumPy array, in schema order. numeric_output picks the
+    COMP-3 and ZONED representation: scaled 'int64' (default), 'float64' or 'decimal'.
+    """
+    dtype = build_dtype(schema)
+    records = read_records(file_path, dtype, use_memmap=use_memmap)
+
+    columns = {}
+    for field in schema:
+        field_name = field['name']
+        field_type = field['type']
+        if field_type == 'FILLER':
+            continue
+        raw = records[field_name]
+
+        if field_type == 'CHAR':
+            columns[field_name] = decode_char_column(raw, strip=strip)
+
+        elif field_type == 'COMP':
+            columns[field_name] = decode_comp_column(raw, field.get('signed', True))
+
+        elif field_type == 'COMP-3':
+            values, invalid = decode_packed_column(raw, field['length'], field.get('scale', 0), numeric_output)
+            if invalid.any():
+                lg.warning(f"Decoding failed for {int(invalid.sum())} values of field {field_name}")
+            columns[field_name] = values
+
+        elif field_type == 'ZONED':
+            values, invalid = decode_zoned_column(raw, field['length'], field.get('scale', 0), numeric_output,
+                                                  field.get('sign_position', 'trailing'))
+            if invalid.any():
+                lg.warning(f"Decoding failed for {int(invalid.sum())} values of field {field_name}")
+            columns[field_name] = values
+
+        elif field_type in HEX_FLOAT_FORMATS:
+            columns[field_name] = decode_hex_float_column(raw)
+
+        else:
+            raise ValueError(f"Unsupported field type {field_type} for field {field_name}")
+
+    return columns
+
+
+def decode_dataframe(file_path, schema, strip=False, use_memmap=True, numeric_output='int64'):
+    """Decodes a fixed-length DAT file straight into a DataFrame."""
+    columns = decode_columns(file_path, schema, strip=strip, use_memmap=use_memmap, numeric_output=numeric_output)
+    return pd.DataFrame(columns, columns=list(columns))
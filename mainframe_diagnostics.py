@@ -0,0 +1,87 @@
+import os
+from collections import Counter
+from parser.edcdic_logger import logging as lg
+
+RECORD_LEVEL = '<record>'
+
+
+class DecodeDiagnostics:
+    """Counters and sampled tracing for one decode run.
+
+    Decoders only touch counters on the error paths and check the `tracing` flag once per
+    record, so nothing is formatted while tracing is off. Tracing samples every
+    `trace_every`-th record; `debug` traces every record and logs every decode error.
+    Both can be switched on per job through EBCDIC_DECODE_DEBUG / EBCDIC_TRACE_EVERY.
+    """
+
+    def __init__(self, trace_every=0, debug=False, label=None):
+        self.trace_every = trace_every
+        self.debug = debug
+        self.label = label
+        self.tracing = debug or trace_every > 0
+        self.reset()
+
+    def reset(self):
+        """Zeroes the counters, so a new run neither adds to nor hides behind the previous one's."""
+        self.records = 0
+        self.field_errors = Counter()
+        self.type_errors = Counter()
+        self.field_short_reads = Counter()
+        self.type_short_reads = Counter()
+
+    @classmethod
+    def from_env(cls, label=None):
+        debug = os.environ.get('EBCDIC_DECODE_DEBUG', '').lower() in ('1', 'true', 'yes')
+        trace_every = int(os.environ.get('EBCDIC_TRACE_EVERY', '0') or 0)
+        return cls(trace_every=trace_every, debug=debug, label=label)
+
+    def should_trace(self, record_number):
+        return self.debug or record_number % self.trace_every == 0
+
+    def trace_record(self, record_number, record_bytes, record):
+        lg.info('Record %d (%d bytes): %r', record_number, len(record_bytes), bytes(record_bytes))
+        lg.info('Record %d decoded: %r', record_number, record)
+
+    def field_error(self, field_name, field_type, error):
+        self.type_errors[field_type] += 1
+        self.field_errors[field_name] += 1
+        # Log the first failure per field; later ones only count unless debugging
+        if self.debug or self.field_errors[field_name] == 1:
+            lg.warning('Decoding failed for field %s of type %s: %s', field_name, field_type, error)
+
+    def short_read(self, actual_length, expected_length, field_name=RECORD_LEVEL, field_type=RECORD_LEVEL):
+        self.field_short_reads[field_name] += 1
+        self.type_short_reads[field_type] += 1
+        if self.debug:
+            lg.warning('Short read for %s: %d of %d bytes', field_name, actual_length, expected_length)
+
+    def merge(self, other):
+        """Folds in the counters of another run, e.g. one returned by a worker process."""
+        self.records += other.records
+        self.field_errors.update(other.field_errors)
+        self.type_errors.update(other.type_errors)
+        self.field_short_reads.update(other.field_short_reads)
+        self.type_short_reads.update(other.type_short_reads)
+
+    def summary(self):
+        return {
+            'records': self.records,
+            'errors': sum(self.type_errors.values()),
+            'short_reads': sum(self.type_short_reads.values()),
+            'field_errors': dict(self.field_errors),
+            'type_errors': dict(self.type_errors),
+            'field_short_reads': dict(self.field_short_reads),
+            'type_short_reads': dict(self.type_short_reads),
+        }
+
+    def report(self):
+        summary = self.summary()
+        prefix = f'{self.label}: ' if self.label else ''
+        lg.info(f"{prefix}Decoded {summary['records']} records, {summary['errors']} decode errors, "
+                f"{summary['short_reads']} short reads")
+        if summary['errors']:
+            lg.warning(f"{prefix}Decode errors by type: {summary['type_errors']}; by field: {summary['field_errors']}")
+        if summary['short_reads']:
+            lg.warning(f"{prefix}Short reads by type: {summary['type_short_reads']}; "
+                       f"by field: {summary['field_short_reads']}")
+        return summary
@@ -0,0 +1,108 @@
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from parser.edcdic_logger import logging as lg
+
+INDEX_MAGIC = b'RDWIDX02'
+# magic, source size, source mtime (ns), end of the last complete record, record count
+INDEX_HEADER = struct.Struct('>8sQQQQ')
+RDW = struct.Struct('>HH')
+RDW_SIZE = RDW.size
+
+
+def index_path_for(file_path):
+    return file_path + '.idx'
+
+
+class RdwIndex:
+    """Offsets of every RDW in a variable-length DAT file, built in one pass and persisted as a sidecar.
+
+    Each RDW is 4 bytes: a big-endian record length that includes the RDW itself, then two reserved bytes.
+    """
+
+    def __init__(self, offsets, source_size, source_mtime_ns, end_offset):
+        self.offsets = offsets
+        self.source_size = source_size
+        self.source_mtime_ns = source_mtime_ns
+        # Bytes after end_offset belong to no complete record
+        self.end_offset = end_offset
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, record_number):
+        return self.offsets[record_number]
+
+    @classmethod
+    def build(cls, file_path):
+        stat = os.stat(file_path)
+        offsets = array('Q')
+        offset = 0
+        if stat.st_size:
+            with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                end = len(mapped)
+                while offset + RDW_SIZE <= end:
+                    record_length, _ = RDW.unpack_from(mapped, offset)
+                    if record_length < RDW_SIZE:
+                        raise ValueError(f'Invalid RDW length {record_length} at offset {offset} in {file_path}')
+                    if offset + record_length > end:
+                        lg.warning(f'Truncated record at offset {offset} in {file_path}')
+                        break
+                    offsets.append(offset)
+                    offset += record_length
+        return cls(offsets, stat.st_size, stat.st_mtime_ns, offset)
+
+    def save(self, index_path):
+        offsets = array('Q', self.offsets)
+        if sys.byteorder == 'little':
+            offsets.byteswap()  # the sidecar is always big-endian
+        # A unique temp file per builder, so concurrent builders never write into each other's file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(index_path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(INDEX_HEADER.pack(INDEX_MAGIC, self.source_size, self.source_mtime_ns, self.end_offset,
+                                          len(offsets)))
+                offsets.tofile(f)
+            os.replace(tmp_path, index_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, index_path):
+        with open(index_path, 'rb') as f:
+            magic, source_size, source_mtime_ns, end_offset, count = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+            if magic != INDEX_MAGIC:
+                raise ValueError(f'{index_path} is not an RDW index')
+            offsets = array('Q')
+            offsets.fromfile(f, count)
+        if sys.byteorder == 'little':
+            offsets.byteswap()
+        return cls(offsets, source_size, source_mtime_ns, end_offset)
+
+    def matches(self, file_path):
+        stat = os.stat(file_path)
+        return stat.st_size == self.source_size and stat.st_mtime_ns == self.source_mtime_ns
+
+    @classmethod
+    def load_or_build(cls, file_path, index_path=None):
+        """Loads the sidecar index when it is still current for the DAT file, otherwise rebuilds and saves it."""
+        index_path = index_path or index_path_for(file_path)
+        if os.path.exists(index_path):
+            try:
+                index = cls.load(index_path)
+                if index.matches(file_path):
+                    return index
+                lg.info(f'RDW index {index_path} is stale, rebuilding')
+            except (OSError, ValueError, EOFError, struct.error) as e:
+                lg.warning(f'Ignoring unreadable RDW index {index_path}: {e}')
+
+        index = cls.build(file_path)
+        try:
+            index.save(index_path)
+        except OSError as e:
+            lg.warning(f'Could not save RDW index {index_path}: {e}')
+        return index
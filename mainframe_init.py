@@ -1,70 +1,174 @@
-import codecs
 import os
-from parser.unpacker import unpack_comp, unpack_comp3
-from parser.edcdic_logger import logging as lg
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from bounded_pool import imap_bounded
+from copybook import load_or_compile_layout
+from mainframe_columnar import decode_columns, decode_dataframe
+from mainframe_diagnostics import DecodeDiagnostics
+from mainframe_plan import compile_plan
+from mainframe_reader import open_record_reader
+from mainframe_reconcile import read_header_count, reconcile_file
+from mainframe_writers import open_sink, write_batches
 import logging
 
 logger = logging.getLogger(__name__)
 
 class EBCDICDecoder:
-    def __init__(self, file_path, schema):
+    def __init__(self, file_path, schema, reader='mmap', numeric_output='decimal', diagnostics=None,
+                 record_format='fixed', index_path=None, pad_short=False):
         self.file_path = file_path
         self.schema = schema
-        self.record_size = sum(field['length'] for field in schema)
+        self.reader = reader
+        self.numeric_output = numeric_output
+        self.record_format = record_format
+        self.index_path = index_path
+        self.pad_short = pad_short
+        if diagnostics is None:
+            diagnostics = DecodeDiagnostics.from_env(label=os.path.basename(file_path))
+        self.diagnostics = diagnostics
+        self.plan = compile_plan(schema, numeric_output)
+        self.record_size = self.plan.record_size
+
+    @classmethod
+    def from_copybook(cls, file_path, copybook_path, layout_path=None, **kwargs):
+        """Builds a decoder from a COBOL copybook, loading its precompiled layout when available."""
+        return cls(file_path, load_or_compile_layout(copybook_path, layout_path), **kwargs)
+
+    def iter_records(self, start=0, stop=None, report=True):
+        """Yields decoded records one at a time so memory stays bounded by a single record.
+
+        start/stop are record numbers; records are fixed-length so the reader seeks straight to start.
+        The diagnostics counters start from zero for each run, and their summary is logged once
+        iteration ends unless report is False.
+        """
+        decode = self.plan.decode
+        diagnostics = self.diagnostics
+        diagnostics.reset()
+        tracing = diagnostics.tracing
+        record_number = start
+        try:
+            with self._open_reader() as reader:
+                for record_view in reader.iter_views(start, stop):
+                    # Release the view before yielding so the mapping can close even if iteration stops early
+                    with record_view:
+                        record = decode(record_view, diagnostics)
+                        if tracing and diagnostics.should_trace(record_number):
+                            diagnostics.trace_record(record_number, record_view, record)
+                    record_number += 1
+                    yield record
+
+            if stop is None and self.record_format == 'fixed':
+                trailing_bytes = os.path.getsize(self.file_path) % self.record_size
+                if trailing_bytes:
+                    diagnostics.short_read(trailing_bytes, self.record_size)
+        finally:
+            diagnostics.records += record_number - start
+            if report:
+                diagnostics.report()
+
+    def _open_reader(self):
+        return open_record_reader(self.file_path, self.record_size, backend=self.reader,
+                                  record_format=self.record_format, index_path=self.index_path,
+                                  diagnostics=self.diagnostics, pad_short=self.pad_short)
+
+    def _options(self):
+        # Constructor arguments a worker process needs to rebuild an equivalent decoder
+        return {'reader': self.reader, 'numeric_output': self.numeric_output,
+                'record_format': self.record_format, 'index_path': self.index_path, 'pad_short': self.pad_short}
+
+    def record_count(self):
+        """Number of complete records; RDW files read (or build) the sidecar offset index."""
+        if self.record_format == 'rdw':
+            with self._open_reader() as reader:
+                return reader.record_count
+        return os.path.getsize(self.file_path) // self.record_size
+
+    def read_range(self, start, stop):
+        """Decodes records start..stop-1 without touching the records before start."""
+        return list(self.iter_records(start, stop, report=False))
+
+    def get_record(self, n):
+        if n < 0:
+            n += self.record_count()
+        records = self.read_range(n, n + 1) if n >= 0 else []
+        if not records:
+            raise IndexError(f'Record {n} out of range for {self.file_path}')
+        return records[0]
+
+    def iter_batches(self, batch_size=10000):
+        """Yields lists of at most batch_size decoded records."""
+        batch = []
+        for record in self.iter_records():
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
 
     def parse(self):
+        return list(self.iter_records())
+
+    def write_to(self, path, sink_format='parquet', batch_size=10000):
+        """Streams decoded batches straight into a Parquet, Arrow IPC or NDJSON file; peak memory is one batch."""
+        with open_sink(path, self.schema, sink_format, self.numeric_output) as sink:
+            return write_batches(self.iter_batches(batch_size), sink)
+
+    def iter_parallel_batches(self, workers=None, chunk_records=100000):
+        """Decodes record-aligned chunks of the file in a process pool, yielding them in file order.
+
+        At most two chunks per worker are in flight, so memory tracks workers x chunk_records
+        rather than the file size.
+        """
+        self.diagnostics.reset()
+        record_count = self.record_count()
+        if self.record_format == 'fixed' and os.path.getsize(self.file_path) % self.record_size:
+            self.diagnostics.short_read(os.path.getsize(self.file_path) % self.record_size, self.record_size)
+        starts = range(0, record_count, chunk_records)
+        stops = [min(start + chunk_records, record_count) for start in starts]
+        worker_diagnostics = DecodeDiagnostics(self.diagnostics.trace_every, self.diagnostics.debug,
+                                               self.diagnostics.label)
+        workers = workers or os.cpu_count()
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for batch, diagnostics in imap_bounded(
+                    pool, _decode_range, repeat(self.file_path), repeat(self.schema), repeat(self._options()),
+                    repeat(worker_diagnostics), starts, stops, window=2 * workers,
+                ):
+                    self.diagnostics.merge(diagnostics)
+                    yield batch
+        finally:
+            self.diagnostics.report()
+
+    def parse_parallel(self, workers=None, chunk_records=100000):
         results = []
-        with open(self.file_path, 'rb') as f:
-            while True:
-                record_bytes = f.read(self.record_size)
-                if not record_bytes or len(record_bytes) < self.record_size:
-                    break
-
-                record = {}
-                byte_pointer = 0
-
-                for field in self.schema:
-                    field_name = field['name']
-                    field_type = field['type']
-                    field_length = field['length']
-                    field_data = record_bytes[byte_pointer : byte_pointer + field_length]
-                    actual_length = len(field_data)
-                    byte_pointer += field_length
-
-                    lg.info(f'Starting Pointer: {byte_pointer - field_length}')
-                    lg.info(f'End Pointer: {byte_pointer}')
-
-                    try:
-                        if field_type == 'CHAR':
-                            if actual_length < field_length:
-                                decoded_data = ' ' * (field_length - actual_length)
-                            else:
-                                decoded_data = codecs.decode(field_data, 'cp500')
-                            record[field_name] = decoded_data
-
-                        elif field_type == 'COMP':
-                            decoded_data = unpack_comp(field_data, field_length)
-                            record[field_name] = decoded_data
-
-                        elif field_type == 'COMP-3':
-                            decoded_data = unpack_comp3(field_data, field_length)
-                            record[field_name] = decoded_data
-
-                    except (ValueError, IndexError) as e:
-                        record[field_name] = 0
-                        lg.warning(f"Decoding failed for field {field_name}: {e}")
-
-                results.append(record)
+        for batch in self.iter_parallel_batches(workers=workers, chunk_records=chunk_records):
+            results.extend(batch)
         return results
 
+    def parse_columns(self, as_dataframe=True, use_memmap=True, numeric_output=None):
+        """Columnar decode mode: decodes whole columns at once instead of one dict per record.
+
+        numeric_output defaults to the decoder's own, so parse() and parse_columns() agree. Only
+        fixed-length files can be viewed as a record array; RDW files raise ValueError.
+        """
+        if self.record_format != 'fixed':
+            raise ValueError(f'Columnar decoding needs fixed-length records, {self.file_path} is {self.record_format}')
+        numeric_output = numeric_output or self.numeric_output
+        if as_dataframe:
+            return decode_dataframe(self.file_path, self.schema, use_memmap=use_memmap, numeric_output=numeric_output)
+        return decode_columns(self.file_path, self.schema, use_memmap=use_memmap, numeric_output=numeric_output)
+
     def get_header_src_count(self):
-        src_file_hdr_path = self.file_path.replace('.DAT', '') + '_hdr.DAT'
-        if os.path.exists(src_file_hdr_path):
-            with open(src_file_hdr_path, 'rb') as f:
-                line = f.readline()
-                decoded_data = codecs.decode(line, 'cp500')
-                data_list = decoded_data.split()
-                return int(data_list[1])
-        else:
-            lg.info('Header File does not exist')
-            return None
+        return read_header_count(self.file_path)
+
+    def validate_counts(self):
+        """Reconciles the `_hdr.DAT` count with the file size (or RDW index) without decoding any record."""
+        return reconcile_file(self.file_path, self.record_size, self.record_format, self.index_path)
+
+
+def _decode_range(file_path, schema, options, diagnostics, start, stop):
+    # Runs in a worker process; the decode plan comes from that process's plan cache and the
+    # diagnostics counters travel back to the parent to be merged into one report
+    decoder = EBCDICDecoder(file_path, schema, diagnostics=diagnostics, **options)
+    return list(decoder.iter_records(start, stop, report=False)), decoder.diagnostics
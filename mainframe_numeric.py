@@ -0,0 +1,220 @@
+import math
+from decimal import Decimal
+
+import numpy as np
+
+NUMERIC_OUTPUTS = ('decimal', 'int64', 'float64')
+
+# byte -> (high nibble, low nibble)
+NIBBLE_PAIRS = tuple((byte >> 4, byte & 0x0F) for byte in range(256))
+
+# byte -> the two packed digits it holds (0..99), or -1 when either nibble is not a digit
+PACKED_DIGIT_PAIRS = tuple(high * 10 + low if high < 10 and low < 10 else -1 for high, low in NIBBLE_PAIRS)
+PACKED_DIGIT_PAIR_TABLE = np.array(PACKED_DIGIT_PAIRS, dtype=np.int64)
+
+# Packed sign nibbles: A, C, E, F are positive, B and D negative
+NEGATIVE_SIGNS = (0x0B, 0x0D)
+SIGN_TABLE = np.array([-1 if low in NEGATIVE_SIGNS else 1 if low >= 0x0A else 0 for _, low in NIBBLE_PAIRS],
+                      dtype=np.int64)
+LAST_DIGIT_TABLE = np.array([high if high < 10 else -1 for high, _ in NIBBLE_PAIRS], dtype=np.int64)
+
+# Largest packed field whose digits still fit in an int64 (2 * 9 - 1 = 17 digits)
+MAX_PACKED_INT64_LENGTH = 9
+
+# Largest zoned (one digit per byte) field that still fits in an int64
+MAX_ZONED_INT64_LENGTH = 18
+
+ZONE_SIGN_POSITIONS = ('trailing', 'leading')
+
+
+def scale_value(value, scale, output):
+    """Turns the unscaled integer of a numeric field into the requested output type."""
+    if output == 'decimal':
+        return Decimal(value).scaleb(-scale) if scale else Decimal(value)
+    if output == 'int64':
+        return value
+    if output == 'float64':
+        return value / 10 ** scale if scale else float(value)
+    raise ValueError(f"Unknown numeric output {output}, expected one of {NUMERIC_OUTPUTS}")
+
+
+def unpack_packed(field_data, scale=0, output='decimal'):
+    """Decodes one packed decimal (COMP-3) value using the byte -> digit-pair table."""
+    value = 0
+    for byte in field_data[:-1]:
+        pair = PACKED_DIGIT_PAIRS[byte]
+        if pair < 0:
+            raise ValueError(f'invalid packed decimal byte {byte:#04x}')
+        value = value * 100 + pair
+
+    last_digit, sign = NIBBLE_PAIRS[field_data[-1]]
+    if last_digit > 9 or sign < 0x0A:
+        raise ValueError(f'invalid packed decimal sign byte {field_data[-1]:#04x}')
+    value = value * 10 + last_digit
+    if sign in NEGATIVE_SIGNS:
+        value = -value
+    return scale_value(value, scale, output)
+
+
+class PackedDecoder:
+    """Per-field COMP-3 decoder with its scale and output type bound at compile time.
+
+    Like decode_packed_column, fields wider than MAX_PACKED_INT64_LENGTH bytes are only
+    accepted with 'decimal' output when the length is given.
+    """
+
+    __slots__ = ('scale', 'output')
+
+    def __init__(self, scale=0, output='decimal', length=None):
+        if output not in NUMERIC_OUTPUTS:
+            raise ValueError(f"Unknown numeric output {output}, expected one of {NUMERIC_OUTPUTS}")
+        if length is not None and length > MAX_PACKED_INT64_LENGTH and output != 'decimal':
+            raise ValueError(f'COMP-3 field of {length} bytes does not fit in {output}')
+        self.scale = scale
+        self.output = output
+
+    def __call__(self, field_data):
+        return unpack_packed(field_data, self.scale, self.output)
+
+
+def unpack_zoned(field_data, scale=0, output='decimal', sign_position='trailing'):
+    """Decodes one signed zoned decimal (PIC S9 DISPLAY) value; the sign overpunches a zone nibble."""
+    value = 0
+    for byte in field_data:
+        digit = byte & 0x0F
+        if digit > 9:
+            raise ValueError(f'invalid zoned decimal byte {byte:#04x}')
+        value = value * 10 + digit
+
+    sign_byte = field_data[-1] if sign_position == 'trailing' else field_data[0]
+    if sign_byte >> 4 in NEGATIVE_SIGNS:
+        value = -value
+    return scale_value(value, scale, output)
+
+
+class ZonedDecoder:
+    """Per-field zoned decimal decoder with scale, output type and sign position bound at compile time."""
+
+    __slots__ = ('scale', 'output', 'sign_position')
+
+    def __init__(self, scale=0, output='decimal', sign_position='trailing'):
+        if output not in NUMERIC_OUTPUTS:
+            raise ValueError(f"Unknown numeric output {output}, expected one of {NUMERIC_OUTPUTS}")
+        if sign_position not in ZONE_SIGN_POSITIONS:
+            raise ValueError(f"Unknown sign position {sign_position}, expected one of {ZONE_SIGN_POSITIONS}")
+        self.scale = scale
+        self.output = output
+        self.sign_position = sign_position
+
+    def __call__(self, field_data):
+        return unpack_zoned(field_data, self.scale, self.output, self.sign_position)
+
+
+def unpack_hex_float(field_data):
+    """Decodes an IBM hexadecimal float: COMP-1 (4 bytes) or COMP-2 (8 bytes)."""
+    bits = int.from_bytes(field_data, 'big')
+    fraction_bits = 8 * len(field_data) - 8
+    fraction = bits & ((1 << fraction_bits) - 1)
+    exponent = (bits >> fraction_bits) & 0x7F
+    value = math.ldexp(fraction, 4 * (exponent - 64) - fraction_bits)
+    return -value if bits >> (fraction_bits + 7) else value
+
+
+def unpack_unsigned(field_data):
+    """Decodes an unsigned big-endian binary (COMP) value of any width."""
+    return int.from_bytes(field_data, 'big')
+
+
+def as_byte_matrix(values, length):
+    """Accepts an (n, length) uint8 array or a sequence of equal-length byte strings."""
+    if isinstance(values, np.ndarray):
+        return values.reshape(-1, length)
+    return np.frombuffer(b''.join(values), dtype=np.uint8).reshape(-1, length)
+
+
+def decode_packed_column(values, length, scale=0, output='int64'):
+    """Decodes a whole column of packed decimal values in one call.
+
+    Returns the decoded column and a boolean mask of rows with an invalid nibble
+    (those rows decode to 0). 'int64' gives the scaled integer (digits without
+    the implied decimal point), 'float64' applies the scale, 'decimal' builds
+    Decimal objects.
+    """
+    if output not in NUMERIC_OUTPUTS:
+        raise ValueError(f"Unknown numeric output {output}, expected one of {NUMERIC_OUTPUTS}")
+    raw = as_byte_matrix(values, length)
+
+    if length > MAX_PACKED_INT64_LENGTH:
+        if output != 'decimal':
+            raise ValueError(f'COMP-3 field of {length} bytes does not fit in {output}')
+        return _decode_packed_rows(raw, scale)
+
+    pairs = PACKED_DIGIT_PAIR_TABLE[raw[:, :-1]]
+    last_digits = LAST_DIGIT_TABLE[raw[:, -1]]
+    signs = SIGN_TABLE[raw[:, -1]]
+    invalid = (pairs < 0).any(axis=1) | (last_digits < 0) | (signs == 0)
+
+    unscaled = np.zeros(raw.shape[0], dtype=np.int64)
+    for i in range(length - 1):
+        unscaled = unscaled * 100 + pairs[:, i]
+    unscaled = (unscaled * 10 + last_digits) * signs
+    unscaled[invalid] = 0
+
+    if output == 'int64':
+        return unscaled, invalid
+    if output == 'float64':
+        return unscaled / 10.0 ** scale, invalid
+    column = np.empty(raw.shape[0], dtype=object)
+    column[:] = [scale_value(int(value), scale, 'decimal') for value in unscaled]
+    return column, invalid
+
+
+def _decode_packed_rows(raw, scale):
+    # Fields wider than int64 fall back to exact per-row Decimal decoding
+    column = np.empty(raw.shape[0], dtype=object)
+    invalid = np.zeros(raw.shape[0], dtype=bool)
+    for i, row in enumerate(raw):
+        try:
+            column[i] = unpack_packed(row.tobytes(), scale, 'decimal')
+        except ValueError:
+            column[i] = Decimal(0)
+            invalid[i] = True
+    return column, invalid
+
+
+def decode_zoned_column(values, length, scale=0, output='int64', sign_position='trailing'):
+    """Decodes a whole column of zoned decimal values; returns the column and an invalid-row mask."""
+    if output not in NUMERIC_OUTPUTS:
+        raise ValueError(f"Unknown numeric output {output}, expected one of {NUMERIC_OUTPUTS}")
+    if length > MAX_ZONED_INT64_LENGTH:
+        raise ValueError(f'zoned decimal field of {length} bytes does not fit in int64')
+    raw = as_byte_matrix(values, length)
+
+    digits = (raw & 0x0F).astype(np.int64)
+    invalid = (digits > 9).any(axis=1)
+    unscaled = np.zeros(raw.shape[0], dtype=np.int64)
+    for i in range(length):
+        unscaled = unscaled * 10 + digits[:, i]
+
+    zones = raw[:, -1 if sign_position == 'trailing' else 0] >> 4
+    unscaled = np.where((zones == 0x0B) | (zones == 0x0D), -unscaled, unscaled)
+    unscaled[invalid] = 0
+
+    if output == 'int64':
+        return unscaled, invalid
+    if output == 'float64':
+        return unscaled / 10.0 ** scale, invalid
+    column = np.empty(raw.shape[0], dtype=object)
+    column[:] = [scale_value(int(value), scale, 'decimal') for value in unscaled]
+    return column, invalid
+
+
+def decode_hex_float_column(values):
+    """Decodes a column of IBM hex floats held as big-endian uint32 (COMP-1) or uint64 (COMP-2)."""
+    bits = values.astype(np.uint64)
+    fraction_bits = 8 * values.dtype.itemsize - 8
+    fraction = (bits & np.uint64((1 << fraction_bits) - 1)).astype(np.float64)
+    exponent = ((bits >> np.uint64(fraction_bits)) & np.uint64(0x7F)).astype(np.int64)
+    column = np.ldexp(fraction, 4 * (exponent - 64) - fraction_bits)
+    negative = (bits >> np.uint64(fraction_bits + 7)).astype(bool)
+    return np.where(negative, -column, column)
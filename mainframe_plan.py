@@ -0,0 +1,166 @@
+import codecs
+import hashlib
+import json
+import struct
+from decimal import Decimal
+from parser.unpacker import unpack_comp
+from mainframe_numeric import PackedDecoder, ZonedDecoder, unpack_hex_float, unpack_unsigned
+from parser.edcdic_logger import logging as lg
+
+# COMP widths that struct can unpack natively as big-endian ints (signed, unsigned)
+COMP_STRUCT_CODES = {2: ('h', 'H'), 4: ('i', 'I'), 8: ('q', 'Q')}
+
+# Value stored for a COMP-3/ZONED field that fails to decode, per numeric_output
+NUMERIC_FALLBACKS = {'decimal': Decimal(0), 'int64': 0, 'float64': 0.0}
+
+# IBM hex float types and the only length each may have
+HEX_FLOAT_LENGTHS = {'COMP-1': 4, 'COMP-2': 8}
+
+_plans = {}
+
+
+def decode_char(field_data):
+    return codecs.decode(field_data, 'cp500')
+
+
+class LengthDecoder:
+    """Binds a parser.unpacker function to its field length at compile time."""
+
+    __slots__ = ('func', 'length')
+
+    def __init__(self, func, length):
+        self.func = func
+        self.length = length
+
+    def __call__(self, field_data):
+        return self.func(field_data, self.length)
+
+
+class DecodePlan:
+    """Schema compiled once: offsets, one record-wide struct.Struct and a decoder per field.
+
+    The struct unpacks native COMP widths straight to ints and skips every other
+    field; those are handed to their bound decoder as memoryview slices of the
+    record, so the per-record loop does no dict lookups, type dispatch or copies.
+    """
+
+    def __init__(self, schema, numeric_output='decimal'):
+        self.key = schema_key(schema, numeric_output)
+        self.numeric_output = numeric_output
+        self.names = []
+        self.types = []
+        self.lengths = []
+        self.offsets = []
+        self.decoders = []
+
+        struct_format = '>'
+        struct_position = 0
+        for field, offset in field_offsets(schema):
+            field_type = field['type']
+            field_length = field['length']
+            if field_type == 'FILLER':
+                continue
+
+            signed = field.get('signed', True)
+
+            # Native COMP fields go into the record struct unless they overlap it (REDEFINES)
+            if field_type == 'COMP' and field_length in COMP_STRUCT_CODES and offset >= struct_position:
+                if offset > struct_position:
+                    struct_format += f'{offset - struct_position}x'
+                struct_format += COMP_STRUCT_CODES[field_length][0 if signed else 1]
+                struct_position = offset + field_length
+                decoder = None
+            else:
+                if field_type == 'CHAR':
+                    decoder = decode_char
+                elif field_type == 'COMP':
+                    decoder = LengthDecoder(unpack_comp, field_length) if signed else unpack_unsigned
+                elif field_type == 'COMP-3':
+                    decoder = PackedDecoder(field.get('scale', 0), numeric_output, field_length)
+                elif field_type == 'ZONED':
+                    decoder = ZonedDecoder(field.get('scale', 0), numeric_output,
+                                           field.get('sign_position', 'trailing'))
+                elif field_type in HEX_FLOAT_LENGTHS:
+                    if field_length != HEX_FLOAT_LENGTHS[field_type]:
+                        raise ValueError(f"{field_type} field {field['name']} must be "
+                                         f"{HEX_FLOAT_LENGTHS[field_type]} bytes, got {field_length}")
+                    decoder = unpack_hex_float
+                else:
+                    raise ValueError(f"Unsupported field type {field_type} for field {field['name']}")
+
+            self.names.append(field['name'])
+            self.types.append(field_type)
+            self.lengths.append(field_length)
+            self.offsets.append(offset)
+            self.decoders.append(decoder)
+
+        self.record_size = schema_record_size(schema)
+        self.record_struct = struct.Struct(struct_format)
+        self.fields = tuple(
+            (name, field_type, decoder, offset, offset + length, self.fallback(field_type))
+            for name, field_type, decoder, offset, length
+            in zip(self.names, self.types, self.decoders, self.offsets, self.lengths)
+        )
+
+    def fallback(self, field_type):
+        """Value stored when a field fails to decode; numeric fields keep their output type."""
+        if field_type in ('COMP-3', 'ZONED'):
+            return NUMERIC_FALLBACKS[self.numeric_output]
+        return 0
+
+    def decode(self, record_bytes, diagnostics=None):
+        """Decodes one record from bytes or a memoryview (e.g. an mmap slice).
+
+        Decode errors are counted on `diagnostics` when given, otherwise logged.
+        """
+        record = {}
+        record_view = memoryview(record_bytes)
+        native_values = iter(self.record_struct.unpack_from(record_view))
+        for field_name, field_type, decoder, start, end, fallback in self.fields:
+            if decoder is None:
+                record[field_name] = next(native_values)
+                continue
+            try:
+                record[field_name] = decoder(record_view[start:end])
+            except (ValueError, IndexError) as e:
+                record[field_name] = fallback
+                if diagnostics is not None:
+                    diagnostics.field_error(field_name, field_type, e)
+                else:
+                    lg.warning(f"Decoding failed for field {field_name}: {e}")
+        return record
+
+
+def field_offsets(schema):
+    """Yields (field, offset) pairs.
+
+    Fields carrying an explicit 'offset' (e.g. from a compiled copybook with REDEFINES)
+    keep it; the others start where the previous field ended.
+    """
+    offset = 0
+    for field in schema:
+        offset = field.get('offset', offset)
+        yield field, offset
+        offset += field['length']
+
+
+def schema_record_size(schema):
+    return max((offset + field['length'] for field, offset in field_offsets(schema)), default=0)
+
+
+def schema_key(schema, numeric_output='decimal'):
+    payload = json.dumps([numeric_output, schema], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def compile_plan(schema, numeric_output='decimal'):
+    """Returns the DecodePlan for a schema, compiled once per process and schema.
+
+    numeric_output selects how COMP-3 fields come back: 'decimal', scaled 'int64' or 'float64'.
+    Compiling is a single pass over the schema, so plans are only cached in memory.
+    """
+    key = schema_key(schema, numeric_output)
+    plan = _plans.get(key)
+    if plan is None:
+        plan = _plans[key] = DecodePlan(schema, numeric_output)
+    return plan
@@ -0,0 +1,217 @@
+import mmap
+import os
+from parser.edcdic_logger import logging as lg
+from mainframe_index import RDW, RDW_SIZE, RdwIndex
+
+READER_BACKENDS = ('mmap', 'buffered')
+RECORD_FORMATS = ('fixed', 'rdw')
+
+
+class MmapRecordReader:
+    """Memory-maps a fixed-length DAT file and yields each record as a memoryview slice.
+
+    Nothing is copied: callers must release (or drop) each view before the reader is closed.
+    """
+
+    def __init__(self, file_path, record_size):
+        self.file_path = file_path
+        self.record_size = record_size
+        self._file = open(file_path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            self._file.close()
+            raise
+        self._view = memoryview(self._mmap)
+        self.record_count = len(self._mmap) // record_size
+
+    def iter_views(self, start=0, stop=None):
+        record_size = self.record_size
+        stop = self.record_count if stop is None else min(stop, self.record_count)
+        view = self._view
+        for offset in range(start * record_size, stop * record_size, record_size):
+            yield view[offset:offset + record_size]
+
+    def close(self, quiet=False):
+        _close_mapping(self._view, self._mmap, self._file, quiet)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close(quiet=exc_type is not None)
+
+
+def _close_mapping(view, mapping, file, quiet=False):
+    """Releases a reader's view and mapping, then closes its file.
+
+    A record view still referenced elsewhere (e.g. by the traceback of a failed decode) makes
+    release() raise BufferError; with quiet, that is logged instead so it cannot replace the
+    exception already propagating, and the mapping is freed once the last view is dropped.
+    """
+    try:
+        view.release()
+        if mapping is not None:
+            mapping.close()
+    except BufferError as e:
+        if not quiet:
+            raise
+        lg.warning(f'Record views still in use, leaving the mapping to be freed later: {e}')
+    finally:
+        file.close()
+
+
+class BufferedRecordReader:
+    """Reads records with readinto() into one reusable buffer, for sources that cannot be memory-mapped.
+
+    Accepts a path or an already open binary file object. Every yielded view points at the
+    same buffer, so a record must be decoded before the next one is requested.
+    """
+
+    def __init__(self, source, record_size):
+        self.record_size = record_size
+        self._owns_file = isinstance(source, (str, bytes, os.PathLike))
+        self._file = open(source, 'rb') if self._owns_file else source
+        self._buffer = bytearray(record_size)
+
+    def iter_views(self, start=0, stop=None):
+        buffer = self._buffer
+        if start:
+            if self._file.seekable():
+                self._file.seek(start * self.record_size, os.SEEK_CUR)
+            else:
+                # Pipes and sockets cannot seek: read and discard the records before start
+                for _ in range(start):
+                    if self._fill(buffer) < self.record_size:
+                        return
+        record_number = start
+        while stop is None or record_number < stop:
+            if self._fill(buffer) < self.record_size:
+                break
+            record_number += 1
+            yield memoryview(buffer)
+
+    def _fill(self, buffer):
+        # Raw streams (pipes, sockets) may return short reads before EOF
+        filled = self._file.readinto(buffer)
+        with memoryview(buffer) as view:
+            while filled and filled < len(buffer):
+                count = self._file.readinto(view[filled:])
+                if not count:
+                    break
+                filled += count
+        return filled or 0
+
+    def close(self):
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class RdwRecordReader:
+    """Memory-maps a variable-length DAT file whose records start with a 4-byte RDW.
+
+    Yields each record payload as a memoryview. A payload shorter than the schema's record
+    size is counted as a short read and raises ValueError, since padding would turn binary
+    and COMP-3 fields into garbage; with pad_short it is instead copied into an EBCDIC-space
+    padded buffer, which is only sound when the missing tail is CHAR data. Seeking to a start
+    record uses the persisted sidecar offset index.
+    """
+
+    def __init__(self, file_path, record_size, index_path=None, diagnostics=None, pad_short=False):
+        self.file_path = file_path
+        self.record_size = record_size
+        self.index_path = index_path
+        self.diagnostics = diagnostics
+        self.pad_short = pad_short
+        self._index = None
+        self._file = open(file_path, 'rb')
+        if os.fstat(self._file.fileno()).st_size:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mmap)
+        else:
+            self._mmap = None
+            self._view = memoryview(b'')
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = RdwIndex.load_or_build(self.file_path, self.index_path)
+        return self._index
+
+    @property
+    def record_count(self):
+        return len(self.index)
+
+    def iter_views(self, start=0, stop=None):
+        view = self._view
+        end = len(view)
+        if start:
+            if start >= len(self.index):
+                return
+            offset = self.index[start]
+        else:
+            offset = 0
+
+        record_number = start
+        while (stop is None or record_number < stop) and offset + RDW_SIZE <= end:
+            record_length, _ = RDW.unpack_from(view, offset)
+            if record_length < RDW_SIZE or offset + record_length > end:
+                lg.warning(f'Invalid or truncated RDW at offset {offset} in {self.file_path}')
+                if self.diagnostics is not None:
+                    self.diagnostics.short_read(end - offset, record_length)
+                break
+            payload = view[offset + RDW_SIZE:offset + record_length]
+            if len(payload) < self.record_size:
+                if self.diagnostics is not None:
+                    self.diagnostics.short_read(len(payload), self.record_size)
+                if not self.pad_short:
+                    payload.release()
+                    raise ValueError(f'Record {record_number} at offset {offset} in {self.file_path} has '
+                                     f'{record_length - RDW_SIZE} of {self.record_size} bytes')
+                padded = bytearray(b'\x40') * self.record_size
+                padded[:len(payload)] = payload
+                payload.release()
+                payload = memoryview(padded)
+            offset += record_length
+            record_number += 1
+            yield payload
+
+    def close(self, quiet=False):
+        _close_mapping(self._view, self._mmap, self._file, quiet)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close(quiet=exc_type is not None)
+
+
+def open_record_reader(source, record_size, backend='mmap', record_format='fixed', index_path=None,
+                       diagnostics=None, pad_short=False):
+    """Opens the requested reader backend, falling back to buffered reads when mmap is not possible.
+
+    record_format='rdw' reads variable-length records with RDW prefixes (always memory-mapped);
+    pad_short lets it pad short records instead of raising (see RdwRecordReader).
+    """
+    if record_format not in RECORD_FORMATS:
+        raise ValueError(f"Unknown record format {record_format}, expected one of {RECORD_FORMATS}")
+    if record_format == 'rdw':
+        return RdwRecordReader(source, record_size, index_path=index_path, diagnostics=diagnostics,
+                               pad_short=pad_short)
+
+    if backend not in READER_BACKENDS:
+        raise ValueError(f"Unknown reader backend {backend}, expected one of {READER_BACKENDS}")
+
+    if backend == 'mmap' and isinstance(source, (str, bytes, os.PathLike)):
+        try:
+            return MmapRecordReader(source, record_size)
+        except (ValueError, OSError) as e:
+            # Empty files, pipes and some network mounts cannot be mapped
+            lg.info(f'mmap unavailable for {source} ({e}), using buffered reads')
+    return BufferedRecordReader(source, record_size)
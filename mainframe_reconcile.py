@@ -0,0 +1,74 @@
+import codecs
+import fnmatch
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from parser.edcdic_logger import logging as lg
+from mainframe_index import RdwIndex
+from mainframe_plan import schema_record_size
+
+ReconcileResult = namedtuple(
+    'ReconcileResult',
+    ['file_path', 'header_count', 'record_count', 'trailing_bytes', 'file_size', 'matches'],
+)
+
+
+def header_path_for(file_path):
+    return file_path.replace('.DAT', '') + '_hdr.DAT'
+
+
+def read_header_count(file_path):
+    """Source record count from the `_hdr.DAT` file next to a DAT file, or None when there is no header."""
+    src_file_hdr_path = header_path_for(file_path)
+    if not os.path.exists(src_file_hdr_path):
+        lg.info(f'Header File does not exist for {file_path}')
+        return None
+    with open(src_file_hdr_path, 'rb') as f:
+        line = f.readline()
+    decoded_data = codecs.decode(line, 'cp500')
+    return int(decoded_data.split()[1])
+
+
+def reconcile_file(file_path, record_size, record_format='fixed', index_path=None):
+    """Checks the header count against the data file without decoding a single record.
+
+    Fixed-length files need only a stat: records = size // record_size, and a
+    non-zero remainder is a partial trailing record. RDW files are counted from
+    their sidecar offset index (index_path, default next to the file).
+    """
+    file_size = os.path.getsize(file_path)
+    if record_format == 'rdw':
+        index = RdwIndex.load_or_build(file_path, index_path)
+        record_count = len(index)
+        trailing_bytes = file_size - index.end_offset
+    else:
+        record_count, trailing_bytes = divmod(file_size, record_size)
+
+    header_count = read_header_count(file_path)
+    matches = header_count is not None and header_count == record_count and trailing_bytes == 0
+    if not matches:
+        lg.warning(f'Reconciliation failed for {file_path}: header {header_count}, records {record_count}, '
+                   f'trailing bytes {trailing_bytes}')
+    return ReconcileResult(file_path, header_count, record_count, trailing_bytes, file_size, matches)
+
+
+def find_data_files(directory, pattern='*.DAT'):
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if fnmatch.fnmatch(name, pattern) and not name.endswith('_hdr.DAT')
+    )
+
+
+def reconcile_directory(directory, schema, pattern='*.DAT', workers=None, record_format='fixed'):
+    """Reconciles every DAT/_hdr.DAT pair in a directory concurrently; results follow file name order."""
+    record_size = schema_record_size(schema)
+    data_files = find_data_files(directory, pattern)
+    reconcile = partial(reconcile_file, record_size=record_size, record_format=record_format)
+    if record_format == 'rdw':
+        # Building RDW indexes walks every record in Python, so it needs processes to scale
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            return list(pool.map(reconcile, data_files))
+    # Only stats and one header line per file, so threads are enough to overlap the I/O
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) * 4)) as pool:
+        return list(pool.map(reconcile, data_files))
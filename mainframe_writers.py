@@ -0,0 +1,134 @@
+import json
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+SINK_FORMATS = ('parquet', 'arrow', 'ndjson')
+
+# Largest precision decimal128 can hold
+MAX_DECIMAL_DIGITS = 38
+
+
+def _digits(field):
+    # Number of decimal digits a numeric field can hold
+    if field['type'] == 'COMP-3':
+        return 2 * field['length'] - 1
+    return field['length']
+
+
+def arrow_type(field, numeric_output='decimal'):
+    """Arrow column type for one decode-schema field."""
+    field_type = field['type']
+    field_length = field['length']
+
+    if field_type == 'CHAR':
+        return pa.string()
+    if field_type == 'COMP':
+        if field.get('signed', True):
+            return pa.int32() if field_length <= 4 else pa.int64()
+        return pa.int32() if field_length <= 2 else pa.int64() if field_length <= 4 else pa.uint64()
+    if field_type in ('COMP-1', 'COMP-2'):
+        return pa.float64()
+    if field_type in ('COMP-3', 'ZONED'):
+        if numeric_output == 'int64':
+            return pa.int64()
+        if numeric_output == 'float64':
+            return pa.float64()
+        scale = field.get('scale', 0)
+        digits = max(_digits(field), scale, 1)
+        if digits > MAX_DECIMAL_DIGITS:
+            raise ValueError(f"{field_type} field {field['name']} holds {digits} digits, more than the "
+                             f"{MAX_DECIMAL_DIGITS} a decimal128 column can store")
+        return pa.decimal128(digits, scale)
+    raise ValueError(f"Unsupported field type {field_type} for field {field['name']}")
+
+
+def arrow_schema(schema, numeric_output='decimal'):
+    """Builds the Arrow schema of decoded records from the decode schema."""
+    return pa.schema([
+        pa.field(field['name'], arrow_type(field, numeric_output)) for field in schema if field['type'] != 'FILLER'
+    ])
+
+
+class ParquetSink:
+    """Streams decoded batches to a Parquet file, one row group per batch."""
+
+    def __init__(self, path, schema, numeric_output='decimal', compression='snappy'):
+        self.schema = arrow_schema(schema, numeric_output)
+        self._writer = pq.ParquetWriter(path, self.schema, compression=compression)
+
+    def write_batch(self, records):
+        self._writer.write_table(pa.Table.from_pylist(records, schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class ArrowIpcSink:
+    """Streams decoded batches to an Arrow IPC file, one record batch per decoded batch."""
+
+    def __init__(self, path, schema, numeric_output='decimal'):
+        self.schema = arrow_schema(schema, numeric_output)
+        self._sink = pa.OSFile(path, 'wb')
+        self._writer = ipc.new_file(self._sink, self.schema)
+
+    def write_batch(self, records):
+        self._writer.write_batch(pa.RecordBatch.from_pylist(records, schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+        self._sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class NdjsonSink:
+    """Streams decoded batches as newline-delimited JSON; Decimal values are written as strings.
+
+    JSON needs no column types, so unlike the Arrow sinks it takes no schema.
+    """
+
+    def __init__(self, path, encoding='utf-8'):
+        self._file = open(path, 'w', encoding=encoding)
+
+    def write_batch(self, records):
+        self._file.write(''.join(json.dumps(record, default=str) + '\n' for record in records))
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def open_sink(path, schema, sink_format='parquet', numeric_output='decimal'):
+    if sink_format == 'parquet':
+        return ParquetSink(path, schema, numeric_output)
+    if sink_format == 'arrow':
+        return ArrowIpcSink(path, schema, numeric_output)
+    if sink_format == 'ndjson':
+        return NdjsonSink(path)
+    raise ValueError(f"Unknown sink format {sink_format}, expected one of {SINK_FORMATS}")
+
+
+def write_batches(batches, sink):
+    """Feeds decoded batches (lists of record dicts) into a sink; returns the number of records written."""
+    written = 0
+    for batch in batches:
+        sink.write_batch(batch)
+        written += len(batch)
+    return written
@@ -1,9 +1,21 @@
 import pandas as pd
+import pyarrow as pa
 import logging
+from xml_keys import dedupe_adjacent_parts, get_canonicalizer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# String columns with at most MAX_CATEGORIES distinct values, covering at most CATEGORY_RATIO
+# of their non-null values, become categoricals in chunked frames
+MAX_CATEGORIES = 256
+CATEGORY_RATIO = 0.5
+# Columns whose last key part is one of these are parsed as timestamps in chunked frames
+DATETIME_FIELDS = ("CreDtTm", "timestamp")
+
+STRING_DTYPE = pd.ArrowDtype(pa.string())
+TIMESTAMP_DTYPE = pd.ArrowDtype(pa.timestamp("us"))
+
 def clean_key(key, separator="_"):
     """
     Cleans a key by removing redundant parent nesting.
@@ -18,14 +30,7 @@ def clean_key(key, separator="_"):
         str: The cleaned key.
     """
     try:
-        key_parts = key.split(separator)  # Split key by separator
-        cleaned_parts = []
-        
-        for part in key_parts:
-            if not cleaned_parts or cleaned_parts[-1] != part:  # Avoid duplicate adjacent parts
-                cleaned_parts.append(part)
-        
-        return separator.join(cleaned_parts)  # Rejoin into a clean key
+        return dedupe_adjacent_parts(key, separator)
     except Exception as e:
         logging.error(f"Error while cleaning key '{key}': {e}")
         return key  # Return original key if error occurs
@@ -43,9 +48,10 @@ def clean_dict_keys(d, separator="_"):
     """
     try:
         cleaned_dict = {}
+        canonical = get_canonicalizer('adjacent', separator).canonical  # cached raw -> clean keys
 
         for key, value in d.items():
-            new_key = clean_key(key, separator)  # Clean the key
+            new_key = canonical(key)  # Clean the key
 
             if isinstance(value, dict):
                 cleaned_dict[new_key] = clean_dict_keys(value, separator)  # Recursively clean nested dict
@@ -57,18 +63,21 @@ def clean_dict_keys(d, separator="_"):
         logging.error(f"Error while cleaning dictionary keys: {e}")
         return d  # Return original dictionary if error occurs
 
-def preprocess_data(data):
+def preprocess_data(data, separator="_"):
     """
     Cleans the keys of all dictionaries in a list before converting to a DataFrame.
 
     Parameters:
         data (list): List of dictionaries to preprocess.
+        separator (str): The separator used in keys (default is "_").
     
     Returns:
         list: List of dictionaries with cleaned keys.
     """
     try:
-        return [clean_dict_keys(item) for item in data]  # Apply cleaning to each dictionary
+        cleaned_data = [clean_dict_keys(item, separator) for item in data]  # Apply cleaning to each dictionary
+        get_canonicalizer('adjacent', separator).save()  # Persist newly seen keys for the next run
+        return cleaned_data
     except Exception as e:
         logging.error(f"Error while preprocessing data: {e}")
         return data  # Return original data if error occurs
@@ -76,6 +85,8 @@ def preprocess_data(data):
 def convert_to_dataframe(data):
     """
     Converts a structured JSON list into a Pandas DataFrame.
+    Keys are cleaned with one column rename instead of rebuilding every record.
+    For compact DataFrames of a bounded number of rows, see iter_dataframes.
 
     Parameters:
         data (list): List of dictionaries to convert.
@@ -84,13 +95,135 @@ def convert_to_dataframe(data):
         pd.DataFrame: Pandas DataFrame with structured data.
     """
     try:
-        cleaned_data = preprocess_data(data)  # Clean keys before conversion
-        df = pd.DataFrame(cleaned_data)  # Convert to DataFrame
-        return df
+        df = pd.DataFrame(data)  # Convert to DataFrame
+        return get_canonicalizer('adjacent').rename_frame(df)  # Clean column names once
     except Exception as e:
         logging.error(f"Error while converting data to DataFrame: {e}")
         return pd.DataFrame()  # Return empty DataFrame if error occurs
 
+def frame_schema(data, separator="_", datetime_fields=DATETIME_FIELDS, max_categories=MAX_CATEGORIES,
+                 category_ratio=CATEGORY_RATIO):
+    """
+    Scans the records once for the column set and a compact dtype per column.
+
+    Parameters:
+        data (list): List of dictionaries (raw keys; they are cleaned here).
+        separator (str): The separator used in keys (default is "_").
+        datetime_fields (tuple): Fields parsed as timestamps, matched on the last key part.
+        max_categories (int): Most distinct values a string column may have to become a categorical.
+        category_ratio (float): Most distinct values per non-null value for a categorical, so
+            mostly unique columns such as IDs stay strings.
+
+    Returns:
+        dict: Clean column name -> "string", "datetime", "object" (non-string values such as
+        AuditTrailEntry lists) or the sorted list of categories, in first-seen column order.
+    """
+    canonical = get_canonicalizer('adjacent', separator).canonical
+    strings = {}  # column -> True while every value seen is a string or None
+    counts = {}  # column -> number of non-null string values
+    categories = {}  # column -> distinct values, None once there are more than max_categories
+
+    for record in data:
+        for key, value in record.items():
+            column = canonical(key)
+            is_string = value is None or value.__class__ is str
+            if not is_string or column not in strings:
+                strings[column] = is_string and strings.get(column, True)
+            if value is not None and is_string:
+                counts[column] = counts.get(column, 0) + 1
+                distinct = categories.setdefault(column, set())
+                if distinct is not None:
+                    distinct.add(value)
+                    if len(distinct) > max_categories:
+                        categories[column] = None
+    get_canonicalizer('adjacent', separator).save()
+
+    schema = {}
+    for column, is_string in strings.items():
+        distinct = categories.get(column)
+        if not is_string:
+            schema[column] = "object"
+        elif column.rsplit(separator, 1)[-1] in datetime_fields:
+            schema[column] = "datetime"
+        elif distinct and len(distinct) <= category_ratio * counts[column]:
+            schema[column] = sorted(distinct)
+        else:
+            schema[column] = "string"
+    return schema
+
+def _clean_rows(records, canonical):
+    # Raw keys that clean to the same column are coalesced, preferring the later non-null value
+    rows = []
+    for record in records:
+        row = {}
+        for key, value in record.items():
+            column = canonical(key)
+            if value is not None or column not in row:
+                row[column] = value
+        rows.append(row)
+    return rows
+
+def _chunk_frame(rows, schema, start):
+    columns = {}
+    for column, kind in schema.items():
+        values = [row.get(column) for row in rows]
+        if kind == "string":
+            columns[column] = pd.array(values, dtype=STRING_DTYPE)
+        elif kind == "datetime":
+            # Offsets are converted to UTC so every chunk has the same naive timestamp type
+            parsed = pd.to_datetime(pd.Series(values, dtype=object), format="ISO8601", errors="coerce", utc=True)
+            columns[column] = parsed.dt.tz_localize(None).astype(TIMESTAMP_DTYPE).array
+        elif kind == "object":
+            columns[column] = pd.array(values, dtype=object)
+        else:
+            columns[column] = pd.Categorical(values, categories=kind)
+    return pd.DataFrame(columns, index=pd.RangeIndex(start, start + len(rows)))
+
+def iter_dataframes(data, chunk_rows=100000, schema=None, separator="_"):
+    """
+    Converts a structured JSON list into DataFrames of at most chunk_rows rows with compact dtypes.
+
+    Every chunk has the same columns and dtypes: Arrow-backed strings, categoricals for
+    low-cardinality string columns, Arrow timestamps for CreDtTm/timestamp fields. Chunks
+    continue each other's index, so combine_chunks can stack them without re-indexing.
+
+    Parameters:
+        data (list): List of dictionaries to convert.
+        chunk_rows (int): Rows per DataFrame.
+        schema (dict): Column -> dtype from frame_schema; pass the same one to keep several
+            inputs (files, workers) consistent. Computed from data when omitted.
+        separator (str): The separator used in keys (default is "_").
+
+    Yields:
+        pd.DataFrame: One chunk of rows with cleaned column names.
+    """
+    if schema is None:
+        schema = frame_schema(data, separator)
+    canonical = get_canonicalizer('adjacent', separator).canonical
+    try:
+        for start in range(0, len(data), chunk_rows):
+            rows = _clean_rows(data[start:start + chunk_rows], canonical)
+            yield _chunk_frame(rows, schema, start)
+    except Exception as e:
+        logging.error(f"Error while converting data to DataFrame chunks: {e}")
+        raise
+
+def combine_chunks(chunks):
+    """
+    Stacks DataFrame chunks from iter_dataframes into one DataFrame.
+
+    Arrow-backed columns are joined as chunked arrays, so their data is not copied; only the
+    categorical codes are.
+
+    Parameters:
+        chunks (iterable): DataFrames with the same schema.
+
+    Returns:
+        pd.DataFrame: All rows, in chunk order.
+    """
+    chunks = list(chunks)
+    return pd.concat(chunks) if chunks else pd.DataFrame()
+
 # Example JSON data with nested and redundant keys
 data = [
     {"pmtid_pmtid_txtid": "12345", "audittrialentry_audittrialentry_reftxf_audittrialentry_reftxf_pmtid": "67890"},
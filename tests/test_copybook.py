@@ -0,0 +1,104 @@
+import os
+import sys
+
+import pytest
+
+# Appended, not prepended: the repo's xml.py would otherwise shadow the standard library package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('parser.edcdic_logger')
+
+from copybook import compile_copybook, is_fixed_format, source_text  # noqa: E402
+
+
+def fixed(*areas):
+    """Fixed-format source: sequence numbers in 1-6, the indicator and area of each line from column 7."""
+    return '\n'.join(f'{number:06d}{area}' for number, area in enumerate(areas, 1))
+
+
+def layout(text):
+    return [(field['name'], field['type'], field['offset'], field['length']) for field in compile_copybook(text)]
+
+
+SIZING_CASES = {
+    'display': ('01 R. 05 A PIC X(5). 05 B PIC 9(4).', [('A', 'CHAR', 0, 5), ('B', 'ZONED', 5, 4)]),
+    'signed_zoned': ('01 R. 05 A PIC S9(5)V99.', [('A', 'ZONED', 0, 7)]),
+    'comp3_odd': ('01 R. 05 A PIC S9(5) COMP-3.', [('A', 'COMP-3', 0, 3)]),
+    'comp3_even': ('01 R. 05 A PIC S9(6)V99 USAGE IS PACKED-DECIMAL.', [('A', 'COMP-3', 0, 5)]),
+    'comp_widths': ('01 R. 05 A PIC S9(4) COMP. 05 B PIC 9(9) BINARY. 05 C PIC S9(18) COMP.',
+                    [('A', 'COMP', 0, 2), ('B', 'COMP', 2, 4), ('C', 'COMP', 6, 8)]),
+    'hex_floats': ('01 R. 05 A COMP-1. 05 B COMP-2.', [('A', 'COMP-1', 0, 4), ('B', 'COMP-2', 4, 8)]),
+    'group_usage': ('01 R. 05 G COMP-3. 10 A PIC S9(3). 10 B PIC 9(4).', [('A', 'COMP-3', 0, 2), ('B', 'COMP-3', 2, 3)]),
+    'filler': ('01 R. 05 A PIC X. 05 FILLER PIC X(3). 05 PIC X(2). 05 B PIC X.',
+               [('A', 'CHAR', 0, 1), ('FILLER', 'FILLER', 1, 3), ('FILLER', 'FILLER', 4, 2), ('B', 'CHAR', 6, 1)]),
+    'level_88': ("01 R. 05 A PIC X. 88 A-YES VALUE 'Y'. 05 B PIC X.", [('A', 'CHAR', 0, 1), ('B', 'CHAR', 1, 1)]),
+    'occurs': ('01 R. 05 A PIC X(2) OCCURS 3 TIMES. 05 B PIC X.',
+               [('A_1', 'CHAR', 0, 2), ('A_2', 'CHAR', 2, 2), ('A_3', 'CHAR', 4, 2), ('B', 'CHAR', 6, 1)]),
+    'occurs_group': ('01 R. 05 G OCCURS 2. 10 A PIC X. 10 B PIC S9(3) COMP-3. 05 C PIC X.',
+                     [('A_1', 'CHAR', 0, 1), ('B_1', 'COMP-3', 1, 2), ('A_2', 'CHAR', 3, 1), ('B_2', 'COMP-3', 4, 2),
+                      ('C', 'CHAR', 6, 1)]),
+    'occurs_nested': ('01 R. 05 G OCCURS 2. 10 A PIC X OCCURS 2.',
+                      [('A_1_1', 'CHAR', 0, 1), ('A_1_2', 'CHAR', 1, 1), ('A_2_1', 'CHAR', 2, 1), ('A_2_2', 'CHAR', 3, 1)]),
+    'occurs_depending': ('01 R. 05 N PIC 9. 05 A PIC X OCCURS 1 TO 2 TIMES DEPENDING ON N. 05 B PIC X.',
+                         [('N', 'ZONED', 0, 1), ('A_1', 'CHAR', 1, 1), ('A_2', 'CHAR', 2, 1), ('B', 'CHAR', 3, 1)]),
+    'redefines': ('01 R. 05 A PIC X(4). 05 B REDEFINES A PIC S9(7) COMP-3. 05 C PIC X.',
+                  [('A', 'CHAR', 0, 4), ('B', 'COMP-3', 0, 4), ('C', 'CHAR', 4, 1)]),
+    'redefines_longer': ('01 R. 05 A PIC X(2). 05 B REDEFINES A PIC X(5). 05 C PIC X.',
+                         [('A', 'CHAR', 0, 2), ('B', 'CHAR', 0, 5), ('C', 'CHAR', 5, 1)]),
+    'redefines_group': ('01 R. 05 A PIC X(4). 05 G REDEFINES A. 10 B PIC X(2). 10 C PIC X(2). 05 D PIC X.',
+                        [('A', 'CHAR', 0, 4), ('B', 'CHAR', 0, 2), ('C', 'CHAR', 2, 2), ('D', 'CHAR', 4, 1)]),
+    'two_records': ('01 R1. 05 A PIC X(3). 01 R2. 05 B PIC X(2).', [('A', 'CHAR', 0, 3), ('B', 'CHAR', 0, 2)]),
+}
+
+
+@pytest.mark.parametrize('name', SIZING_CASES)
+def test_compile_copybook_layout(name):
+    text, expected = SIZING_CASES[name]
+    assert layout(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('01 R. 05 A PIC S9(5)V99 COMP-3.', {'scale': 2}),
+    ('01 R. 05 A PIC S9(3) SIGN IS LEADING.', {'sign_position': 'leading'}),
+    ('01 R. 05 A PIC S9(3) SIGN TRAILING.', {}),
+    ('01 R. 05 A PIC 9(4) COMP.', {'signed': False}),
+])
+def test_compile_copybook_field_options(text, expected):
+    field, = compile_copybook(text)
+    options = {key: value for key, value in field.items() if key not in ('name', 'type', 'offset', 'length')}
+    assert options == expected
+
+
+@pytest.mark.parametrize('lines, expected', [
+    ([fixed(' 01 R.')], True),
+    (['       01 R.', '      * comment', '', '123456-    X.'], True),
+    (['01 R.', '   05 A PIC X.'], False),
+    (['      05 A PIC X.'], False),
+    (['12345A 01 R.'], False),
+])
+def test_is_fixed_format(lines, expected):
+    assert is_fixed_format(lines) is expected
+
+
+def test_fixed_format_drops_sequence_comments_and_identification():
+    text = fixed(' 01 R.'.ljust(66) + 'IDENT001', '* a comment', '/ page break', ' 05 A PIC X(2).')
+    assert source_text(text).split() == ['01', 'R.', '05', 'A', 'PIC', 'X(2).']
+
+
+def test_free_format_drops_comment_lines_only():
+    text = '01 R.\n      * a comment\n   05 A PIC X(2).'
+    assert layout(text) == [('A', 'CHAR', 0, 2)]
+
+
+@pytest.mark.parametrize('areas, expected', [
+    ((' 01 R.', ' 05 LONG-NA', '-    ME PIC X(3).'), [('LONG_NAME', 'CHAR', 0, 3)]),
+    ((' 01 R.', " 05 A PIC X(70) VALUE 'AB", "-    'CD'."), [('A', 'CHAR', 0, 70)]),
+    ((' 01 R.', ' 05 A PIC X', '-    (4).', ' 05 B PIC X.'), [('A', 'CHAR', 0, 4), ('B', 'CHAR', 4, 1)]),
+])
+def test_continuation_lines(areas, expected):
+    assert layout(fixed(*areas)) == expected
+
+
+def test_continued_literal_resumes_after_its_quote():
+    area = "01 R. 05 A PIC X(70) VALUE 'AB"
+    assert source_text(fixed(' ' + area, "-    'CD'.")) == area.ljust(65) + "CD'."
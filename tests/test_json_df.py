@@ -0,0 +1,53 @@
+import copy
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# Appended, not prepended: the repo's xml.py would otherwise shadow the standard library package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_df import META_COLUMNS, convert_to_dataframe  # noqa: E402
+
+
+def json_normalize_frame(data):
+    """The original convert_to_dataframe: pad a missing AuditTrailEntry with [{}], then json_normalize."""
+    data = copy.deepcopy(data)
+    for item in data:
+        if 'AuditTrailEntry' not in item:
+            item['AuditTrailEntry'] = [{}]
+    return pd.json_normalize(data, record_path=['AuditTrailEntry'], meta=META_COLUMNS, errors='ignore')
+
+
+CASES = {
+    'entries': [
+        {'CreDtTm': 't1', 'NbOfTxs': '2', 'TxId': 'a', 'State': 'OK',
+         'AuditTrailEntry': [{'Usr': 'u1', 'notes': 'n'}, {'Usr': 'u2', 'notes': None}]},
+        {'CreDtTm': 't2', 'NbOfTxs': '1', 'TxId': 'b', 'State': 'KO', 'AuditTrailEntry': [{'Usr': 'u3'}]},
+    ],
+    'missing_key': [
+        {'CreDtTm': 't1', 'NbOfTxs': '1', 'TxId': 'a', 'State': 'OK', 'AuditTrailEntry': [{'Usr': 'u1'}]},
+        {'CreDtTm': 't2', 'NbOfTxs': '0', 'TxId': 'b', 'State': 'OK'},
+    ],
+    'empty_list': [
+        {'CreDtTm': 't1', 'NbOfTxs': '1', 'TxId': 'a', 'State': 'OK', 'AuditTrailEntry': [{'Usr': 'u1'}]},
+        {'CreDtTm': 't2', 'NbOfTxs': '0', 'TxId': 'b', 'State': 'OK', 'AuditTrailEntry': []},
+    ],
+    'missing_meta': [
+        {'TxId': 'a', 'AuditTrailEntry': [{'Usr': 'u1'}]},
+        {'CreDtTm': 't2', 'State': None, 'AuditTrailEntry': [{'Usr': 'u2', 'Role': 'r'}]},
+    ],
+    'nested_entries': [
+        {'CreDtTm': 't1', 'NbOfTxs': '1', 'TxId': 'a', 'State': 'OK',
+         'AuditTrailEntry': [{'Usr': {'Id': 'u1', 'Org': {'Nm': 'o1'}}}, {'Usr': {'Id': 'u2'}, 'Act': 'x'}]},
+    ],
+}
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_convert_to_dataframe_matches_json_normalize(name):
+    data = CASES[name]
+    original = copy.deepcopy(data)
+    pd.testing.assert_frame_equal(convert_to_dataframe(data), json_normalize_frame(data))
+    assert data == original
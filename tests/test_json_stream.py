@@ -0,0 +1,155 @@
+import io
+import json
+import os
+import random
+import sys
+
+import pytest
+
+# Appended, not prepended: the repo's xml.py would otherwise shadow the standard library package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import iter_json_array, transcode_blob, transcode_json_to_ndjson  # noqa: E402
+
+CHUNK_SIZES = (1, 2, 3, 7, 1024)
+
+RECORDS = [
+    {'id': 1, 'name': 'Zoë', 'tags': ['a', 'ß', '€'], 'nested': {'x': [1, 2.5, -3e-2], 'ok': True}},
+    {'id': 12345, 'amount': 0.125, 'note': None, 'text': 'quote " and \\ and  '},
+    'π ≈ 3.14159',
+    -1234.5e10,
+    [],
+    {},
+    '🚀 emoji',
+    False,
+]
+
+
+def _stream(text, bom=False):
+    return io.BytesIO((b'\xef\xbb\xbf' if bom else b'') + text.encode('utf-8'))
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('bom', (False, True))
+@pytest.mark.parametrize('indent', (None, 2))
+def test_values_split_across_chunks(chunk_size, bom, indent):
+    text = json.dumps(RECORDS, indent=indent, ensure_ascii=False)
+    assert list(iter_json_array(_stream(text, bom), chunk_size)) == RECORDS
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_numbers_are_not_cut_at_chunk_boundaries(chunk_size):
+    numbers = [123.456, 10, -7, 1e100, 0.5, 99999999999999999999]
+    assert list(iter_json_array(_stream(json.dumps(numbers)), chunk_size)) == numbers
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('[]', []),
+    ('  [ ]  ', []),
+    ('{"a": 1}', [{'a': 1}]),
+    ('\n[1]\n', [1]),
+])
+def test_edge_shapes(text, expected):
+    for chunk_size in CHUNK_SIZES:
+        assert list(iter_json_array(_stream(text), chunk_size)) == expected
+
+
+def test_random_documents_match_json_loads():
+    rng = random.Random(0)
+    alphabet = ['a', 'é', '中', '😀', ' ', '"', '\\', '\n']
+    for _ in range(50):
+        records = [{'k': ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 20))),
+                    'n': rng.uniform(-1e6, 1e6), 'i': rng.randint(-10 ** 20, 10 ** 20)}
+                   for _ in range(rng.randint(0, 10))]
+        text = json.dumps(records, ensure_ascii=rng.random() < 0.5)
+        assert list(iter_json_array(_stream(text), rng.randint(1, 16))) == json.loads(text)
+
+
+@pytest.mark.parametrize('text', [
+    '[1, 2',
+    '[1 2]',
+    '[1,]',
+    '[1,,2]',
+    '["abc',
+    '[{"a": 1]',
+    '[1] [2]',
+    '[1] x',
+    '"just a string"',
+    '42',
+    '',
+    '[12.]',
+])
+@pytest.mark.parametrize('chunk_size', (1, 3, 1024))
+def test_malformed_input_raises(text, chunk_size):
+    with pytest.raises(ValueError):
+        list(iter_json_array(_stream(text), chunk_size))
+
+
+def test_transcode_json_to_ndjson():
+    dst = io.StringIO()
+    count = transcode_json_to_ndjson(_stream(json.dumps(RECORDS)), dst, chunk_size=5)
+    assert count == len(RECORDS)
+    assert [json.loads(line) for line in dst.getvalue().splitlines()] == RECORDS
+
+
+class LegacyWriter(io.BytesIO):
+    """Stands in for a GCS BlobWriter without terminate(): close() finalizes the object."""
+
+    def __init__(self):
+        super().__init__()
+        self.state = 'open'
+
+    def close(self):
+        if not self.closed:
+            self.state = 'finalized'
+        super().close()
+
+
+class FakeWriter(LegacyWriter):
+    """A BlobWriter whose terminate() cancels the resumable upload."""
+
+    def terminate(self):
+        self.state = 'terminated'
+        io.BytesIO.close(self)
+
+
+class FakeBlob:
+    name = 'fake.ndjson'
+
+    def __init__(self, data=b'', writer_class=FakeWriter):
+        self.data = data
+        self.writer_class = writer_class
+        self.writer = None
+        self.deleted = False
+
+    def open(self, mode, **kwargs):
+        if mode == 'rb':
+            return io.BytesIO(self.data)
+        self.writer = self.writer_class()
+        return io.TextIOWrapper(self.writer, encoding='utf-8')
+
+    def delete(self):
+        self.deleted = True
+
+
+def test_transcode_blob_finalizes_on_success():
+    dst = FakeBlob()
+    assert transcode_blob(FakeBlob(json.dumps(RECORDS).encode('utf-8')), dst, chunk_size=4) == len(RECORDS)
+    assert dst.writer.state == 'finalized'
+    assert not dst.deleted
+
+
+def test_transcode_blob_terminates_the_upload_on_error():
+    dst = FakeBlob()
+    with pytest.raises(ValueError):
+        transcode_blob(FakeBlob(b'[1, 2, {"broken": '), dst, chunk_size=4)
+    assert dst.writer.state == 'terminated'
+    assert not dst.deleted
+
+
+def test_transcode_blob_deletes_the_object_without_terminate():
+    dst = FakeBlob(writer_class=LegacyWriter)
+    with pytest.raises(ValueError):
+        transcode_blob(FakeBlob(b'[1, 2, {"broken": '), dst, chunk_size=4)
+    assert dst.writer.state == 'finalized'
+    assert dst.deleted
@@ -0,0 +1,116 @@
+import os
+import sys
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+# Appended, not prepended: the repo's xml.py would otherwise shadow the standard library package
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mainframe_numeric import (  # noqa: E402
+    PackedDecoder, ZonedDecoder, decode_hex_float_column, decode_packed_column, decode_zoned_column,
+    unpack_hex_float, unpack_packed, unpack_zoned,
+)
+
+PACKED_CASES = [
+    # (field bytes, scale, expected Decimal)
+    (b'\x0c', 0, Decimal('0')),
+    (b'\x12\x3c', 0, Decimal('123')),
+    (b'\x12\x3d', 0, Decimal('-123')),
+    (b'\x12\x3b', 0, Decimal('-123')),
+    (b'\x12\x3f', 0, Decimal('123')),
+    (b'\x01\x23\x45\x6c', 2, Decimal('1234.56')),
+    (b'\x00\x00\x5d', 3, Decimal('-0.005')),
+    (b'\x99\x99\x99\x99\x99\x99\x99\x99\x99\x9c', 0, Decimal('9' * 19)),
+]
+
+ZONED_CASES = [
+    # (field bytes, scale, sign position, expected Decimal)
+    (b'\xf1\xf2\xf3', 0, 'trailing', Decimal('123')),
+    (b'\xf1\xf2\xc3', 0, 'trailing', Decimal('123')),
+    (b'\xf1\xf2\xd3', 0, 'trailing', Decimal('-123')),
+    (b'\xd1\xf2\xf3', 0, 'leading', Decimal('-123')),
+    (b'\xd1\xf2\xf3', 0, 'trailing', Decimal('123')),
+    (b'\xf0\xf1\xf2\xd5', 2, 'trailing', Decimal('-1.25')),
+    (b'\xc0\xf0\xf7', 1, 'leading', Decimal('0.7')),
+]
+
+HEX_FLOAT_CASES = [
+    (b'\x00\x00\x00\x00', 0.0),
+    (b'\x41\x10\x00\x00', 1.0),
+    (b'\xc1\x10\x00\x00', -1.0),
+    (b'\x40\x80\x00\x00', 0.5),
+    (b'\xc2\x76\xa0\x00', -118.625),
+    (b'\x41\x10\x00\x00\x00\x00\x00\x00', 1.0),
+    (b'\x42\x64\x00\x00\x00\x00\x00\x00', 100.0),
+    (b'\xc0\x80\x00\x00\x00\x00\x00\x00', -0.5),
+]
+
+
+@pytest.mark.parametrize('field_data, scale, expected', PACKED_CASES)
+def test_unpack_packed(field_data, scale, expected):
+    assert unpack_packed(field_data, scale) == expected
+    assert PackedDecoder(scale)(field_data) == expected
+
+
+@pytest.mark.parametrize('field_data', [b'\x1a\x3c', b'\x12\x34', b'\xa2\x3c'])
+def test_unpack_packed_rejects_invalid_nibbles(field_data):
+    with pytest.raises(ValueError):
+        unpack_packed(field_data)
+
+
+@pytest.mark.parametrize('output, expected', [('int64', 123456), ('float64', 1234.56), ('decimal', Decimal('1234.56'))])
+def test_unpack_packed_outputs(output, expected):
+    assert unpack_packed(b'\x01\x23\x45\x6c', 2, output) == expected
+
+
+def test_packed_decoder_rejects_wide_int64_fields():
+    PackedDecoder(0, 'int64', 9)
+    PackedDecoder(0, 'decimal', 10)
+    with pytest.raises(ValueError):
+        PackedDecoder(0, 'int64', 10)
+    with pytest.raises(ValueError):
+        PackedDecoder(0, 'float64', 10)
+
+
+@pytest.mark.parametrize('length', [2, 4, 10])
+def test_decode_packed_column_matches_rows(length):
+    rows = [field_data for field_data, _, _ in PACKED_CASES if len(field_data) == length]
+    rows.append(b'\x1a' * (length - 1) + b'\x1c')
+    column, invalid = decode_packed_column(rows, length, 2, 'decimal')
+    assert list(invalid) == [False] * (len(rows) - 1) + [True]
+    assert list(column[:-1]) == [unpack_packed(row, 2) for row in rows[:-1]]
+    assert column[-1] == 0
+
+
+@pytest.mark.parametrize('field_data, scale, sign_position, expected', ZONED_CASES)
+def test_unpack_zoned(field_data, scale, sign_position, expected):
+    assert unpack_zoned(field_data, scale, sign_position=sign_position) == expected
+    assert ZonedDecoder(scale, sign_position=sign_position)(field_data) == expected
+
+
+@pytest.mark.parametrize('sign_position', ['trailing', 'leading'])
+def test_decode_zoned_column_matches_rows(sign_position):
+    rows = [b'\xf1\xf2\xf3', b'\xf1\xf2\xd3', b'\xd1\xf2\xf3', b'\xf1\xfa\xf3']
+    column, invalid = decode_zoned_column(rows, 3, 1, 'float64', sign_position)
+    assert list(invalid) == [False, False, False, True]
+    assert list(column[:-1]) == [unpack_zoned(row, 1, 'float64', sign_position) for row in rows[:-1]]
+    assert column[-1] == 0
+
+
+def test_zoned_decoder_rejects_unknown_sign_position():
+    with pytest.raises(ValueError):
+        ZonedDecoder(0, 'decimal', 'separate')
+
+
+@pytest.mark.parametrize('field_data, expected', HEX_FLOAT_CASES)
+def test_unpack_hex_float(field_data, expected):
+    assert unpack_hex_float(field_data) == expected
+
+
+@pytest.mark.parametrize('length, dtype', [(4, '>u4'), (8, '>u8')])
+def test_decode_hex_float_column_matches_rows(length, dtype):
+    rows = [field_data for field_data, _ in HEX_FLOAT_CASES if len(field_data) == length]
+    column = decode_hex_float_column(np.frombuffer(b''.join(rows), dtype=dtype))
+    assert list(column) == [unpack_hex_float(row) for row in rows]
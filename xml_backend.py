@@ -0,0 +1,102 @@
+import os
+import xml.etree.ElementTree as ET
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+BACKENDS = ('lxml', 'etree')
+DEFAULT_BACKEND = os.environ.get('XML_PARSER_BACKEND') or ('lxml' if lxml_etree is not None else 'etree')
+
+
+class EtreeBackend:
+    """xml.etree.ElementTree parsing (always available)."""
+
+    name = 'etree'
+    parse_errors = (ET.ParseError,)
+
+    def iter_record_elements(self, xml_file_path, record_tag=None):
+        depth = 0
+        root = None
+        for event, element in ET.iterparse(xml_file_path, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = element
+                depth += 1
+                continue
+
+            depth -= 1
+            if depth == 1 and (record_tag is None or element.tag == record_tag):
+                yield element
+            if depth == 1:
+                element.clear()
+                # Drops the processed records (and any siblings kept alive by the root)
+                root.clear()
+
+    def fromstring(self, data):
+        return ET.fromstring(data)
+
+
+class LxmlBackend:
+    """lxml's C parser: comments and PIs are dropped at parse time, huge_tree lifts the depth and text size limits."""
+
+    name = 'lxml'
+
+    def __init__(self):
+        if lxml_etree is None:
+            raise ValueError('The lxml backend needs the lxml package')
+        self.parse_errors = (lxml_etree.XMLSyntaxError,)
+
+    def _options(self):
+        return {'huge_tree': True, 'remove_comments': True, 'remove_pis': True}
+
+    def _first_child_tag(self, xml_file_path):
+        # The second element to start is the root's first child
+        with open(xml_file_path, 'rb') as f:
+            for count, (_, element) in enumerate(lxml_etree.iterparse(f, events=('start',), **self._options())):
+                if count == 1:
+                    return element.tag
+        return None
+
+    def iter_record_elements(self, xml_file_path, record_tag=None):
+        # Only end events of one tag are produced, filtered in C. Without record_tag that is the
+        # first root child's tag, and root children with any other tag are yielded, in document
+        # order, once the next record ends (or at the end of the file)
+        all_records = record_tag is None
+        if all_records:
+            record_tag = self._first_child_tag(xml_file_path)
+            if record_tag is None:
+                return
+        root = None
+        events = lxml_etree.iterparse(xml_file_path, events=('end',), tag=record_tag, **self._options())
+        for _, element in events:
+            parent = element.getparent()
+            if parent is None or parent.getparent() is not None:
+                continue  # the root itself, or an element nested in a record
+            root = parent
+            while element.getprevious() is not None:
+                sibling = parent[0]
+                if all_records and sibling.tag != record_tag:
+                    yield sibling
+                del parent[0]
+            yield element
+            element.clear(keep_tail=True)
+
+        if all_records and root is not None:
+            for sibling in root:
+                if sibling.tag != record_tag:
+                    yield sibling
+
+    def fromstring(self, data):
+        return lxml_etree.fromstring(data, lxml_etree.XMLParser(**self._options()))
+
+
+def get_backend(backend=None):
+    """Parser backend by name ('lxml' or 'etree'); None picks lxml when installed, else ElementTree."""
+    backend = backend or DEFAULT_BACKEND
+    if backend == 'lxml':
+        return LxmlBackend()
+    if backend == 'etree':
+        return EtreeBackend()
+    raise ValueError(f'Unknown XML parser backend {backend}, expected one of {BACKENDS}')
@@ -0,0 +1,294 @@
+"""Benchmarks for XML flattening.
+
+Usage:
+    python xml_bench.py generate payments.xml --size-mb 100 --depth 4 --audit-entries 3
+    python xml_bench.py suite --sizes 1,10,100,1000 --key-policy leaf
+    python xml_bench.py backends payments.xml --key-policy full
+
+Each suite case runs in its own interpreter so its peak RSS is measured in isolation; the
+case outputs (flattened records and DataFrame) are digested and compared with the first case.
+"""
+import os
+import sys
+
+if __name__ == '__main__' and os.path.abspath(sys.path[0] or os.curdir) == os.path.dirname(os.path.abspath(__file__)):
+    # Run as a script from the package directory, whose xml.py would shadow the standard
+    # library's xml package: search the package directory after the standard library instead
+    sys.path.append(sys.path.pop(0))
+
+import argparse
+import hashlib
+import json
+import random
+import string
+import subprocess
+import tempfile
+import time
+import pandas as pd
+from json_df import META_COLUMNS
+from xml_backend import BACKENDS, lxml_etree
+from xml_columnar import build_tables
+from xml_flatten import KEY_POLICIES, XmlFlattener
+from xml_parallel import iter_flatten_parallel
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PAYMENT_NAMESPACE = 'urn:iso:std:iso:20022:tech:xsd:pain.001.001.03'
+STATES = ('ACCP', 'ACSC', 'PDNG', 'RJCT', 'CANC')
+USERS = ('batch', 'ops01', 'ops02', 'recon', 'system')
+
+# Frames are digested this many rows at a time so multi-GB runs do not render one giant CSV
+DIGEST_ROWS = 100000
+
+
+def _word(rng, length=8):
+    return ''.join(rng.choice(string.ascii_uppercase + string.digits) for _ in range(length))
+
+
+def _timestamp(rng):
+    return (f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T'
+            f'{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}')
+
+
+def payment_record(rng, number, depth=3, audit_entries=2):
+    """One ISO 20022-style <Pmt> record as XML text."""
+    nested = ''.join(f'<Lvl{level}>' for level in range(1, depth + 1))
+    nested += f'<Val>{_word(rng)}</Val>'
+    nested += ''.join(f'</Lvl{level}>' for level in range(depth, 0, -1))
+
+    audit = []
+    for entry in range(audit_entries):
+        notes = f'Status {rng.choice(STATES)} set\nby {rng.choice(USERS)}\r\nref {_word(rng, 12)}'
+        audit.append(
+            f'<AuditTrailEntry><timestamp>{_timestamp(rng)}</timestamp><user>{rng.choice(USERS)}</user>'
+            f'<action>{rng.choice(STATES)}</action><Notes>{notes}</Notes></AuditTrailEntry>'
+        )
+
+    return (
+        f'<Pmt>'
+        f'<GrpHdr><MsgId>MSG{number:010d}</MsgId><CreDtTm>{_timestamp(rng)}</CreDtTm>'
+        f'<NbOfTxs>{rng.randint(1, 999)}</NbOfTxs></GrpHdr>'
+        f'<PmtId><InstrId>{_word(rng)}</InstrId><EndToEndId>{_word(rng, 16)}</EndToEndId>'
+        f'<TxId>TX{number:012d}</TxId></PmtId>'
+        f'<Amt><InstdAmt Ccy="EUR">{rng.randint(1, 10 ** 7) / 100:.2f}</InstdAmt></Amt>'
+        f'<Cdtr><Nm>{_word(rng, 12)}</Nm><PstlAdr><Ctry>DE</Ctry><AdrLine>{_word(rng, 20)}</AdrLine>'
+        f'<AdrLine>{rng.randint(10000, 99999)} {_word(rng, 10)}</AdrLine></PstlAdr></Cdtr>'
+        f'<SplmtryData>{nested}</SplmtryData>'
+        f'<State>{rng.choice(STATES)}</State>'
+        f'{"".join(audit)}'
+        f'</Pmt>\n'
+    )
+
+
+def generate_payment_xml(xml_file_path, record_count=None, size_mb=None, depth=3, audit_entries=2, seed=0):
+    """Writes a synthetic payment file of record_count records (or about size_mb megabytes); returns the count."""
+    rng = random.Random(seed)
+    if record_count is None:
+        sample = sum(len(payment_record(rng, number, depth, audit_entries).encode()) for number in range(50)) / 50
+        record_count = max(1, int((size_mb or 1) * 1024 * 1024 / sample))
+        rng = random.Random(seed)
+
+    with open(xml_file_path, 'w', encoding='utf-8', buffering=1024 * 1024) as f:
+        f.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<Document xmlns="{PAYMENT_NAMESPACE}">\n')
+        for number in range(record_count):
+            f.write(payment_record(rng, number, depth, audit_entries))
+        f.write('</Document>\n')
+    return record_count
+
+
+def time_call(function, repeat=3):
+    """Fastest of repeat runs: (seconds, result of the last run)."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def compare_backends(xml_file_path, flattener, repeat=3):
+    """Flattens the file with every installed parser backend; returns {backend: metrics} and checks the outputs agree."""
+    results = {}
+    reference = None
+    for backend in BACKENDS:
+        if backend == 'lxml' and lxml_etree is None:
+            continue
+        seconds, records = time_call(lambda: flattener.flatten_file(xml_file_path, backend), repeat)
+        if reference is None:
+            reference = records
+        results[backend] = {
+            'seconds': seconds,
+            'records': len(records),
+            'records_per_sec': len(records) / seconds if seconds else float('inf'),
+            'identical': records == reference,
+        }
+    return results
+
+
+def frame_digest(df):
+    """Order-sensitive digest of a DataFrame's values; NaN and None digest the same."""
+    digest = hashlib.sha256(','.join(map(str, df.columns)).encode())
+    for start in range(0, len(df), DIGEST_ROWS):
+        digest.update(df.iloc[start:start + DIGEST_ROWS].to_csv(index=False, header=False).encode())
+    return digest.hexdigest()
+
+
+class RecordDigest:
+    """Passes records through while counting and digesting them (the xml_to_json output)."""
+
+    def __init__(self, records):
+        self.records = records
+        self.count = 0
+        self.digest = hashlib.sha256()
+
+    def __iter__(self):
+        for record in self.records:
+            self.digest.update(json.dumps(record).encode())
+            self.digest.update(b'\n')
+            self.count += 1
+            yield record
+
+
+def _json_normalize_frame(records):
+    # The original pipeline: a list of dicts, then json_normalize over AuditTrail with meta columns
+    records = list(records)
+    for record in records:
+        record.setdefault('AuditTrail', [{}])
+    return pd.json_normalize(records, record_path=['AuditTrail'], meta=META_COLUMNS, errors='ignore')
+
+
+def _builder_frame(records):
+    return build_tables(records, parent_keys=META_COLUMNS, as_arrow=False, keep_empty=True)[1]
+
+
+def _case_records(case, xml_file_path, flattener, workers):
+    if case.startswith('lxml'):
+        return flattener.iter_file(xml_file_path, 'lxml')
+    if case.startswith('parallel'):
+        return iter_flatten_parallel(xml_file_path, flattener, workers)
+    return flattener.iter_file(xml_file_path, 'etree')
+
+
+# case -> how the DataFrame is built from the record stream
+CASES = {
+    'etree+json_normalize': _json_normalize_frame,
+    'etree+builder': _builder_frame,
+    'lxml+builder': _builder_frame,
+    'parallel+builder': _builder_frame,
+}
+
+
+def run_case(case, xml_file_path, key_policy='leaf', workers=None):
+    """Runs one case in this process: xml_to_json then convert_to_dataframe; returns its metrics."""
+    import resource
+    flattener = XmlFlattener(key_policy)
+    start = time.perf_counter()
+    records = RecordDigest(_case_records(case, xml_file_path, flattener, workers))
+    df = CASES[case](records)
+    seconds = time.perf_counter() - start
+
+    peak_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return {
+        'seconds': seconds,
+        'records': records.count,
+        'rows': len(df),
+        'records_per_sec': records.count / seconds if seconds else float('inf'),
+        'peak_rss_mb': peak_kb / 1024,
+        'records_digest': records.digest.hexdigest(),
+        'frame_digest': frame_digest(df),
+    }
+
+
+# Run from a scratch directory with the package appended to sys.path: this directory has an
+# xml.py that would otherwise shadow the standard library's xml package
+CASE_SCRIPT = (
+    'import json, sys; sys.path.append(sys.argv[1]); from xml_bench import run_case; '
+    'print(json.dumps(run_case(sys.argv[2], sys.argv[3], sys.argv[4], int(sys.argv[5]) or None)))'
+)
+
+
+def run_case_subprocess(case, xml_file_path, key_policy='leaf', workers=None):
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        output = subprocess.run(
+            [sys.executable, '-c', CASE_SCRIPT, PACKAGE_DIR, case, os.path.abspath(xml_file_path), key_policy,
+             str(workers or 0)],
+            cwd=scratch_dir, check=True, capture_output=True, text=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_suite(sizes_mb, key_policy='leaf', cases=None, depth=3, audit_entries=2, workers=None, work_dir=None):
+    """Generates one payment file per size and runs every case on it; returns {'case[size MB]': metrics}."""
+    cases = [case for case in cases or CASES if case != 'lxml+builder' or lxml_etree is not None]
+    results = {}
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        for size_mb in sizes_mb:
+            xml_file_path = os.path.join(tmp_dir, f'payments_{size_mb}mb.xml')
+            generate_payment_xml(xml_file_path, size_mb=size_mb, depth=depth, audit_entries=audit_entries)
+            reference = None
+            for case in cases:
+                metrics = run_case_subprocess(case, xml_file_path, key_policy, workers)
+                digests = (metrics['records_digest'], metrics['frame_digest'])
+                reference = reference or digests
+                metrics['identical'] = digests == reference
+                results[f'{case}[{size_mb}MB]'] = metrics
+            os.remove(xml_file_path)
+    return results
+
+
+def print_results(results):
+    print(f"{'benchmark':<34} {'records':>10} {'records/s':>12} {'seconds':>9} {'peak MB':>9} {'identical':>10}")
+    for name, metrics in results.items():
+        peak = f"{metrics['peak_rss_mb']:.0f}" if 'peak_rss_mb' in metrics else '-'
+        print(f"{name:<34} {metrics['records']:>10} {metrics['records_per_sec']:>12,.0f} "
+              f"{metrics['seconds']:>9.3f} {peak:>9} {str(metrics['identical']):>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark XML flattening.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help='Write a synthetic ISO 20022-style payment file')
+    generate.add_argument('xml_file')
+    generate.add_argument('--records', type=int)
+    generate.add_argument('--size-mb', type=float, default=1)
+    generate.add_argument('--depth', type=int, default=3, help='Nesting depth of the SplmtryData block')
+    generate.add_argument('--audit-entries', type=int, default=2, help='AuditTrailEntry elements per record')
+    generate.add_argument('--seed', type=int, default=0)
+
+    suite = commands.add_parser('suite', help='xml_to_json + convert_to_dataframe over several file sizes')
+    suite.add_argument('--sizes', default='1,10,100', help='Comma-separated file sizes in MB')
+    suite.add_argument('--key-policy', default='leaf', choices=sorted(KEY_POLICIES))
+    suite.add_argument('--case', action='append', choices=sorted(CASES), help='Limit to these cases')
+    suite.add_argument('--depth', type=int, default=3)
+    suite.add_argument('--audit-entries', type=int, default=2)
+    suite.add_argument('--workers', type=int)
+    suite.add_argument('--work-dir', help='Where the generated files go (they can be several GB)')
+
+    backends = commands.add_parser('backends', help='Compare the lxml and ElementTree parser backends')
+    backends.add_argument('xml_file')
+    backends.add_argument('--key-policy', default='full', choices=sorted(KEY_POLICIES))
+    backends.add_argument('--repeat', type=int, default=3)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        count = generate_payment_xml(args.xml_file, args.records, args.size_mb, args.depth, args.audit_entries,
+                                     args.seed)
+        print(f'{count} records written to {args.xml_file}')
+        return 0
+
+    if args.command == 'suite':
+        sizes = [float(size) if '.' in size else int(size) for size in args.sizes.split(',')]
+        results = run_suite(sizes, args.key_policy, args.case, args.depth, args.audit_entries, args.workers,
+                            args.work_dir)
+    else:
+        results = compare_backends(args.xml_file, XmlFlattener(args.key_policy), args.repeat)
+    print_results(results)
+    return 0 if all(metrics['identical'] for metrics in results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
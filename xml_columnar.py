@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from xml_flatten import AUDIT_PARENT_KEYS, explode_audit_trail
+from xml_types import typed_columns
+
+
+class ColumnBuffers:
+    """Growing table as one Python list per column; cells a row does not have are filled with missing."""
+
+    def __init__(self, missing=None):
+        self.missing = missing
+        self.columns = {}
+        self.rows = 0
+
+    def add_row(self, row):
+        columns = self.columns
+        rows = self.rows
+        for column, value in row.items():
+            values = columns.get(column)
+            if values is None:
+                values = columns[column] = [self.missing] * rows
+            values.append(value)
+        self.rows = rows = rows + 1
+        if len(row) != len(columns):
+            for values in columns.values():
+                if len(values) < rows:
+                    values.append(self.missing)
+
+    def to_arrow(self, column_types=None):
+        """Arrow table; columns in column_types (see xml_types) are converted in bulk, the rest stay strings."""
+        if column_types:
+            return pa.table(typed_columns(self.columns, column_types))
+        # from_pandas makes a NaN missing value null
+        return pa.table({column: pa.array(values, from_pandas=True) for column, values in self.columns.items()})
+
+    def to_pandas(self, column_types=None, object_columns=()):
+        """DataFrame with inferred dtypes, or with column_types one built from to_arrow() with Arrow-backed dtypes.
+
+        object_columns are handed to pandas as object arrays, so an all-missing column stays object.
+        """
+        if not self.columns:
+            return pd.DataFrame(index=range(self.rows))
+        if column_types:
+            return self.to_arrow(column_types).to_pandas(types_mapper=pd.ArrowDtype)
+        return pd.DataFrame({column: np.array(values, dtype=object) if column in object_columns else values
+                             for column, values in self.columns.items()}, copy=False)
+
+
+class ColumnarBuilder:
+    """Fills a parent table and an AuditTrail child table straight from flattened records.
+
+    Every scalar column of a record goes to the parent table; each entry of the child_key
+    list becomes a child row carrying parent_keys from its record (see explode_audit_trail).
+    Records are consumed one at a time, so no list of records or json_normalize pass is needed.
+    missing fills child cells a row does not have (NaN reproduces json_normalize's frames).
+    """
+
+    def __init__(self, child_key='AuditTrail', parent_keys=AUDIT_PARENT_KEYS, keep_empty=False, column_types=None,
+                 missing=None):
+        self.child_key = child_key
+        self.parent_keys = tuple(parent_keys)
+        self.keep_empty = keep_empty
+        self.column_types = column_types
+        self.missing = missing
+        self.parent = ColumnBuffers()
+        self.child = ColumnBuffers(missing)
+
+    def add_record(self, record):
+        self.parent.add_row({column: value for column, value in record.items() if not isinstance(value, list)})
+        for row in explode_audit_trail(record, self.child_key, self.parent_keys, self.keep_empty, self.missing):
+            self.child.add_row(row)
+
+    def add_records(self, records):
+        for record in records:
+            self.add_record(record)
+        return self
+
+    def child_columns(self):
+        # Parent keys go last, as json_normalize puts meta columns after the record columns
+        columns = self.child.columns
+        return [column for column in columns if column not in self.parent_keys] + \
+               [key for key in self.parent_keys if key in columns]
+
+    def to_arrow(self):
+        """(parent table, child table) as Arrow tables."""
+        return self.parent.to_arrow(self.column_types), \
+            self.child.to_arrow(self.column_types).select(self.child_columns())
+
+    def to_pandas(self):
+        """(parent table, child table) as DataFrames."""
+        # Parent keys are object columns, as json_normalize builds its meta columns
+        child = self.child.to_pandas(self.column_types, object_columns=self.parent_keys)
+        return self.parent.to_pandas(self.column_types), child[self.child_columns()]
+
+
+def build_tables(records, child_key='AuditTrail', parent_keys=AUDIT_PARENT_KEYS, as_arrow=True, keep_empty=False,
+                 column_types=None):
+    """Builds (parent, child) tables from an iterable of flattened records, e.g. a flattener's iter_file().
+
+    column_types ({column or last key part: 'int' / 'decimal' / 'datetime' / ...}, e.g.
+    xml_types.COLUMN_TYPES or column_types_from_xsd()) converts those columns in bulk.
+    """
+    builder = ColumnarBuilder(child_key, parent_keys, keep_empty, column_types).add_records(records)
+    return builder.to_arrow() if as_arrow else builder.to_pandas()
@@ -0,0 +1,339 @@
+from xml_select import PathTrie
+from xml_stream import iter_record_elements
+
+AUDIT_TRAIL_ENTRY = 'AuditTrailEntry'
+AUDIT_TRAIL = 'AuditTrail'
+AUDIT_PARENT_KEYS = ('CreDtTm', 'NbOfTxs', 'TxId', 'State')
+
+# \r and \n become spaces in a single pass
+NEWLINE_TABLE = str.maketrans({'\r': ' ', '\n': ' '})
+
+
+def clean_tag(tag):
+    """Removes {namespace} / dynamic ID patterns from an XML tag."""
+    start = tag.find('{')
+    while start != -1:
+        end = tag.find('}', start)
+        if end == -1:
+            break
+        tag = tag.replace(tag[start:end + 1], '')
+        start = tag.find('{')
+    return tag.strip('_')
+
+
+def join_key(parent_key, child_key, separator='_'):
+    return f'{parent_key}{separator}{child_key}' if parent_key else child_key
+
+
+def refine_key(parent_key, child_key, separator='_'):
+    """Joins keys unless the last part of the parent key already is the child key."""
+    if parent_key and parent_key.split(separator)[-1] == child_key:
+        return child_key
+    return join_key(parent_key, child_key, separator)
+
+
+def unique_key(parent_key, child_key, separator='_'):
+    """Joins keys keeping only the first occurrence of every part."""
+    parts = parent_key.split(separator) if parent_key else []
+    return separator.join(dict.fromkeys(parts + [child_key]))
+
+
+KEY_JOINS = {
+    'concat': join_key,
+    'refine': refine_key,
+    'unique': unique_key,
+}
+
+# policy name -> (how a child key is built from its parent key, what a leaf is stored under in its
+# container, how a nested container's keys are renamed when merged into its parent)
+KEY_POLICIES = {
+    'leaf': ('concat', 'tag', 'keep'),                # xml.py: leaf tags only, no parent prefix
+    'full': ('concat', 'path', 'keep'),               # enhance_xml.py: full tag path
+    'prefix': ('concat', 'path', 'prefix'),           # main3_xml.py, parse.py: path re-prefixed per level
+    'refine': ('refine', 'path', 'container'),        # xml_main.py
+    'refine_parent': ('refine', 'path', 'parent'),    # new_main_xml.py
+    'unique': ('unique', 'path', 'parent'),           # main_xml_2.py: duplicate path parts removed
+}
+DUPLICATE_POLICIES = ('overwrite', 'concat')
+NOTES_POLICIES = ('rename', 'raw')
+
+_UNSET = object()
+
+
+class _KeyContext:
+    """Key state of one container path: its own key plus cached local key -> record column mappings.
+
+    With a column selection, state is the PathTrie state of the path, and leaf()/child() return
+    None for leaves and subtrees that are not wanted.
+    """
+
+    def __init__(self, flattener, key, parent=None, merge=None, state=None):
+        self.flattener = flattener
+        self.key = key
+        self.parent = parent
+        # Maps a key of this container to the key it gets in the parent container; None at the record level
+        self.merge = merge
+        self.state = state
+        self.columns = {}
+        self.leaves = {}
+        self.children = {}
+        self._audit_fields = _UNSET
+
+    def column(self, local_key):
+        try:
+            return self.columns[local_key]
+        except KeyError:
+            column = local_key
+            context = self
+            while context.merge is not None:
+                column = context.merge(column)
+                context = context.parent
+            self.columns[local_key] = column
+            return column
+
+    def leaf(self, tag_key):
+        try:
+            return self.leaves[tag_key]
+        except KeyError:
+            flattener = self.flattener
+            selection = flattener.selection
+            if selection is not None and not selection.accepts(selection.step(self.state, tag_key)):
+                self.leaves[tag_key] = None
+                return None
+            local_key = tag_key if flattener.leaf_key == 'tag' else flattener.join(self.key, tag_key)
+            column = self.leaves[tag_key] = self.column(local_key)
+            return column
+
+    def child(self, tag_key):
+        try:
+            return self.children[tag_key]
+        except KeyError:
+            context = self.children[tag_key] = self.flattener._child_context(self, tag_key)
+            return context
+
+    def audit_fields(self):
+        """With a column selection: False when AuditTrailEntry is not wanted here, None when all of it
+        is, otherwise a cache of wanted-ness per entry field."""
+        if self._audit_fields is _UNSET:
+            selection = self.flattener.selection
+            state = selection.step(self.state, AUDIT_TRAIL_ENTRY)
+            if not state:
+                self._audit_fields = False
+            elif selection.accepts(state):
+                self._audit_fields = None
+            else:
+                self._audit_fields = _FieldFilter(selection, state)
+        return self._audit_fields
+
+
+class _FieldFilter(dict):
+    """Wanted-ness of AuditTrailEntry fields, computed once per field tag."""
+
+    def __init__(self, selection, state):
+        super().__init__()
+        self.selection = selection
+        self.state = state
+
+    def __missing__(self, tag_key):
+        wanted = self[tag_key] = self.selection.accepts(self.selection.step(self.state, tag_key))
+        return wanted
+
+
+class XmlFlattener:
+    """Flattens record elements into dicts in one non-recursive pass.
+
+    key_policy picks how column names are built (see KEY_POLICIES), duplicates whether a
+    repeated column keeps the last value or joins all values with a space, and notes whether
+    AuditTrailEntry/Notes is renamed to "notes" (always present) or kept as is. Tag cleaning
+    and column names are computed once per distinct tag and path and cached.
+
+    columns optionally restricts the output to the given tag paths (see PathTrie); subtrees
+    that cannot lead to a wanted path are skipped without being visited.
+    """
+
+    def __init__(self, key_policy='full', duplicates='overwrite', notes='rename', clean=clean_tag, separator='_',
+                 columns=None):
+        if key_policy not in KEY_POLICIES:
+            raise ValueError(f'Unknown key policy {key_policy}, expected one of {tuple(KEY_POLICIES)}')
+        if duplicates not in DUPLICATE_POLICIES:
+            raise ValueError(f'Unknown duplicates policy {duplicates}, expected one of {DUPLICATE_POLICIES}')
+        if notes not in NOTES_POLICIES:
+            raise ValueError(f'Unknown notes policy {notes}, expected one of {NOTES_POLICIES}')
+
+        # Constructor arguments, so worker processes can rebuild an identical flattener
+        self.options = {'key_policy': key_policy, 'duplicates': duplicates, 'notes': notes, 'clean': clean,
+                        'separator': separator, 'columns': columns}
+        join_name, self.leaf_key, self.merge_policy = KEY_POLICIES[key_policy]
+        key_join = KEY_JOINS[join_name]
+        self.join = lambda parent_key, child_key: key_join(parent_key, child_key, separator)
+        self.separator = separator
+        self.concat = duplicates == 'concat'
+        self.rename_notes = notes == 'rename'
+        self.clean = clean
+        self.selection = PathTrie(columns) if columns is not None else None
+        self._tag_keys = {}
+        self._roots = {}
+
+    def with_columns(self, columns):
+        """A flattener with the same policies that extracts only the given column paths."""
+        return XmlFlattener(**{**self.options, 'columns': columns})
+
+    def tag_key(self, tag):
+        try:
+            return self._tag_keys[tag]
+        except KeyError:
+            key = self._tag_keys[tag] = self.clean(tag)
+            return key
+
+    def _child_context(self, parent, tag_key):
+        state = None
+        if self.selection is not None:
+            state = self.selection.step(parent.state, tag_key)
+            if not state:
+                return None
+        key = self.join(parent.key, tag_key)
+        if self.merge_policy == 'keep':
+            merge = lambda k: k
+        elif self.merge_policy == 'prefix':
+            merge = lambda k: f'{key}{self.separator}{k}'
+        elif self.merge_policy == 'container':
+            merge = lambda k: self.join(key, k)
+        else:
+            merge = lambda k: self.join(parent.key, k)
+        return _KeyContext(self, key, parent, merge, state)
+
+    def _root_context(self, parent_key):
+        try:
+            return self._roots[parent_key]
+        except KeyError:
+            state = self.selection.start if self.selection is not None else None
+            context = self._roots[parent_key] = _KeyContext(self, parent_key, state=state)
+            return context
+
+    def audit_entry(self, element, fields=None):
+        entry = {}
+        tag_key = self.tag_key
+        for subchild in element:
+            if subchild.tag.__class__ is not str:
+                continue  # comments / processing instructions
+            key = tag_key(subchild.tag)
+            if fields is not None and not fields[key]:
+                continue
+            text = subchild.text
+            value = text.strip().translate(NEWLINE_TABLE) if text else None
+            if self.rename_notes and key == 'Notes':
+                key = 'notes'
+            entry[key] = value
+        if fields is not None and not entry:
+            return None  # no wanted field in this entry
+        if self.rename_notes and (fields is None or fields['Notes']):
+            entry.setdefault('notes', None)
+        return entry
+
+    def flatten(self, element, parent_key='', data_dict=None):
+        """Flattens the children of element into data_dict; AuditTrailEntry children become an AuditTrail list."""
+        data = {} if data_dict is None else data_dict
+        repeated = {}
+        concat = self.concat
+        selective = self.selection is not None
+        tag_key = self.tag_key
+
+        stack = [(iter(element), self._root_context(parent_key), [])]
+        while stack:
+            children, context, entries = stack[-1]
+            for child in children:
+                tag = child.tag
+                if tag.__class__ is not str:
+                    continue  # comments / processing instructions
+                key = tag_key(tag)
+
+                if key == AUDIT_TRAIL_ENTRY:
+                    if not selective:
+                        entries.append(self.audit_entry(child))
+                    else:
+                        fields = context.audit_fields()
+                        entry = self.audit_entry(child, fields) if fields is not False else None
+                        if entry is not None:
+                            entries.append(entry)
+                elif len(child):
+                    child_context = context.child(key)
+                    if child_context is not None:
+                        stack.append((iter(child), child_context, []))
+                        break
+                else:
+                    column = context.leaf(key)
+                    if column is None:
+                        continue
+                    text = child.text
+                    value = text.strip().translate(NEWLINE_TABLE) if text else None
+                    if concat and column in data:
+                        if column in repeated:
+                            repeated[column].append(value)
+                        else:
+                            repeated[column] = [data[column], value]
+                    else:
+                        data[column] = value
+            else:
+                stack.pop()
+                if entries:
+                    column = context.column(AUDIT_TRAIL)
+                    repeated.pop(column, None)
+                    data[column] = entries
+
+        for column, values in repeated.items():
+            values = [value for value in values if value is not None]
+            data[column] = ' '.join(values) if values else None
+        return data
+
+    def iter_file(self, xml_file_path, backend=None, record_tag=None):
+        """Streams the XML file, yielding one flattened record per child of the root."""
+        for record in iter_record_elements(xml_file_path, backend, record_tag):
+            yield self.flatten(record)
+
+    def flatten_file(self, xml_file_path, backend=None, record_tag=None):
+        return list(self.iter_file(xml_file_path, backend, record_tag))
+
+
+
+def iter_xml_to_json(xml_file_path, flattener, columns=None):
+    """Streams the XML file, yielding one flattened record per child of the root in constant memory.
+
+    columns optionally limits the output to these tag paths, e.g. ["GrpHdr/CreDtTm", "**/TxId", "AuditTrailEntry"].
+    """
+    if columns is not None:
+        flattener = flattener.with_columns(columns)
+    return flattener.iter_file(xml_file_path)
+
+
+def normalize_entry(entry, prefix='', separator='.'):
+    """Flattens nested dicts in an entry into dotted keys ({'a': {'b': 1}} -> {'a.b': 1}), as json_normalize does."""
+    if not prefix and not any(isinstance(value, dict) for value in entry.values()):
+        return entry
+    flat = {}
+    for key, value in entry.items():
+        key = f'{prefix}{separator}{key}' if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(normalize_entry(value, key, separator))
+        else:
+            flat[key] = value
+    return flat
+
+
+def explode_audit_trail(record, child_key=AUDIT_TRAIL, parent_keys=AUDIT_PARENT_KEYS, keep_empty=False, missing=None):
+    """Yields one row per entry of record[child_key], each carrying parent_keys from its record.
+
+    Nested dicts in an entry become dotted keys and a parent key absent from the record is
+    filled with missing. With keep_empty, a record without child_key at all still yields one
+    row of parent keys, while an empty list yields none: the shape of json_normalize(record_path=...,
+    meta=..., errors='ignore') over records whose missing child_key was padded with [{}].
+    """
+    keys = {key: record.get(key, missing) for key in parent_keys}
+    if child_key not in record:
+        if keep_empty:
+            yield keys
+        return
+    for entry in record[child_key] or ():
+        entry = normalize_entry(entry)
+        if not keys.keys().isdisjoint(entry):
+            raise ValueError(f'Conflicting parent key name in {child_key} entry {entry}')
+        yield {**entry, **keys}
@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import tempfile
+
+# Per-user cache (XDG_CACHE_HOME, else ~/.cache) rather than the shared temp directory
+KEY_MAP_DIR = os.environ.get('XML_KEY_MAP_DIR') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'xml_key_maps')
+KEY_MAP_VERSION = 1
+
+
+def dedupe_adjacent_parts(key, separator='_'):
+    """'pmtid_pmtid_txtid' -> 'pmtid_txtid' (preprocessing.py clean_key)."""
+    parts = key.split(separator)
+    return separator.join(part for index, part in enumerate(parts) if index == 0 or parts[index - 1] != part)
+
+
+def dedupe_parts(key, separator='_'):
+    """Keeps the first occurrence of every part (main3_xml.py refine_key_unique)."""
+    return separator.join(dict.fromkeys(key.split(separator)))
+
+
+KEY_RULES = {
+    'adjacent': dedupe_adjacent_parts,
+    'unique': dedupe_parts,
+}
+
+
+class KeyCanonicalizer:
+    """Raw -> clean column name table, computed once per distinct key and persisted across runs.
+
+    The number of distinct keys is tiny next to the number of rows, so cleaning is a dict
+    lookup per key and, for DataFrames, a single rename of the columns.
+    """
+
+    def __init__(self, rule='adjacent', separator='_', cache_dir=KEY_MAP_DIR):
+        if rule not in KEY_RULES:
+            raise ValueError(f'Unknown key rule {rule}, expected one of {tuple(KEY_RULES)}')
+        self.rule = rule
+        self.separator = separator
+        self.map_path = os.path.join(cache_dir, f'{rule}.json') if cache_dir else None
+        self.mapping = self._load()
+        self._dirty = False
+
+    def _load(self):
+        if not self.map_path or not os.path.exists(self.map_path):
+            return {}
+        try:
+            with open(self.map_path, 'r', encoding='utf-8') as f:
+                table = json.load(f)
+            if table.get('version') == KEY_MAP_VERSION and table.get('separator') == self.separator:
+                return table['mapping']
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Ignoring unreadable key map {self.map_path}: {e}")
+        return {}
+
+    def save(self):
+        """Persists newly seen keys; a no-op when nothing changed or there is no cache_dir."""
+        if not self._dirty or not self.map_path:
+            return
+        try:
+            cache_dir = os.path.dirname(self.map_path)
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+            # Merge with what other processes saved meanwhile, then replace atomically
+            mapping = {**self._load(), **self.mapping}
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': KEY_MAP_VERSION, 'separator': self.separator, 'mapping': mapping}, f)
+            os.replace(tmp_path, self.map_path)
+            self._dirty = False
+        except OSError as e:
+            logging.warning(f"Could not save key map {self.map_path}: {e}")
+
+    def canonical(self, key):
+        try:
+            return self.mapping[key]
+        except KeyError:
+            if not isinstance(key, str):
+                return key
+            clean = self.mapping[key] = KEY_RULES[self.rule](key, self.separator)
+            self._dirty = True
+            return clean
+
+    def clean_record(self, record):
+        canonical = self.canonical
+        return {canonical(key): value for key, value in record.items()}
+
+    def clean_records(self, records):
+        """Cleans the keys of a list of dicts (later raw keys win when two clean to the same name)."""
+        cleaned = [self.clean_record(record) for record in records]
+        self.save()
+        return cleaned
+
+    def rename_frame(self, df):
+        """Cleans DataFrame column names with one rename.
+
+        Raw columns that clean to the same name are coalesced into the first of them, preferring
+        the value of the later column wherever it is present, like the record-by-record cleaning did.
+        """
+        columns = [self.canonical(column) for column in df.columns]
+        self.save()
+        if len(set(columns)) == len(columns):
+            return df.set_axis(columns, axis=1)
+
+        merged = {}
+        for position, column in enumerate(columns):
+            values = df.iloc[:, position]
+            if column in merged:
+                values = values.where(values.notna(), merged[column])
+            merged[column] = values
+        return df.__class__(merged, index=df.index)
+
+
+_canonicalizers = {}
+
+
+def get_canonicalizer(rule='adjacent', separator='_'):
+    """Process-wide KeyCanonicalizer per rule and separator, so the table is loaded once."""
+    key = (rule, separator)
+    if key not in _canonicalizers:
+        _canonicalizers[key] = KeyCanonicalizer(rule, separator)
+    return _canonicalizers[key]
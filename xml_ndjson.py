@@ -0,0 +1,194 @@
+"""Streams XML straight to NDJSON files (e.g. for BigQuery loads) without a DataFrame stage.
+
+Usage:
+    python xml_ndjson.py input.xml out/payments.ndjson --rows audit --gzip --max-mb 1024
+"""
+import os
+import sys
+
+if __name__ == '__main__' and os.path.abspath(sys.path[0] or os.curdir) == os.path.dirname(os.path.abspath(__file__)):
+    # Run as a script from the package directory, whose xml.py would shadow the standard
+    # library's xml package: search the package directory after the standard library instead
+    sys.path.append(sys.path.pop(0))
+
+import argparse
+import gzip
+import json
+from xml_flatten import AUDIT_PARENT_KEYS, AUDIT_TRAIL, KEY_POLICIES, XmlFlattener, explode_audit_trail
+from xml_parallel import iter_flatten_parallel
+
+ROW_MODES = ('records', 'audit')
+BUFFER_SIZE = 1024 * 1024
+
+
+class NdjsonWriter:
+    """Buffered NDJSON writer with optional gzip and rollover to a new file past max_bytes.
+
+    Rows are serialized with ASCII escapes, so the byte count is known without encoding twice;
+    max_bytes counts uncompressed bytes and files only roll over between rows. With max_bytes,
+    path 'out.ndjson' becomes out-00000.ndjson, out-00001.ndjson, ... Parts are written as
+    '<part>.tmp' and renamed by close(); abort() (or leaving the with block on an exception)
+    deletes them, so a failed run leaves no truncated output.
+    """
+
+    def __init__(self, path, compress=False, max_bytes=None, buffer_size=BUFFER_SIZE, compresslevel=6):
+        if compress and not path.endswith('.gz'):
+            path += '.gz'
+        self.path = path
+        self.compress = compress
+        self.max_bytes = max_bytes
+        self.buffer_size = buffer_size
+        self.compresslevel = compresslevel
+        self.paths = []
+        self.rows = 0
+        self._raw = None
+        self._file = None
+        self._file_bytes = 0
+        self._buffer = []
+        self._buffered = 0
+
+    def _part_path(self):
+        if not self.max_bytes:
+            return self.path
+        stem, extension = self.path, ''
+        for suffix in ('.gz', '.ndjson', '.jsonl', '.json'):
+            if stem.endswith(suffix):
+                stem, extension = stem[:-len(suffix)], suffix + extension
+        return f'{stem}-{len(self.paths):05d}{extension}'
+
+    def _open(self):
+        path = self._part_path()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._raw = open(self._tmp_path(path), 'wb')
+        if self.compress:
+            # The final name goes into the gzip header, not the temporary one
+            self._file = gzip.GzipFile(path, 'wb', self.compresslevel, fileobj=self._raw)
+        else:
+            self._file = self._raw
+        self._file_bytes = 0
+        self.paths.append(path)
+
+    @staticmethod
+    def _tmp_path(path):
+        return path + '.tmp'
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._raw.close()  # GzipFile does not close its fileobj
+            self._file = self._raw = None
+
+    def flush(self):
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._open()
+        self._file.write(''.join(self._buffer).encode('ascii'))
+        self._file_bytes += self._buffered
+        self._buffer = []
+        self._buffered = 0
+
+    def _roll_over(self):
+        self.flush()
+        self._close_file()
+        self._file_bytes = 0
+
+    def write(self, row):
+        line = json.dumps(row, default=str) + '\n'
+        size = len(line)
+        if self.max_bytes and self._file_bytes + self._buffered and \
+                self._file_bytes + self._buffered + size > self.max_bytes:
+            self._roll_over()
+        self._buffer.append(line)
+        self._buffered += size
+        self.rows += 1
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write(row)
+        return self
+
+    def close(self):
+        """Flushes and closes the current file, then gives every part its final name; returns the paths written."""
+        self.flush()
+        self._close_file()
+        for path in self.paths:
+            os.replace(self._tmp_path(path), path)
+        return self.paths
+
+    def abort(self):
+        """Closes and deletes every part written so far."""
+        try:
+            self._close_file()
+        finally:
+            self._buffer = []
+            self._buffered = 0
+            for path in self.paths:
+                try:
+                    os.unlink(self._tmp_path(path))
+                except FileNotFoundError:
+                    pass
+            self.paths = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def iter_rows(records, rows='records', child_key=AUDIT_TRAIL, parent_keys=AUDIT_PARENT_KEYS, keep_empty=False):
+    """Flattened records as they are ('records'), or exploded into one row per AuditTrail entry ('audit')."""
+    if rows == 'records':
+        return iter(records)
+    if rows == 'audit':
+        return (row for record in records for row in explode_audit_trail(record, child_key, parent_keys, keep_empty))
+    raise ValueError(f'Unknown row mode {rows}, expected one of {ROW_MODES}')
+
+
+def xml_to_ndjson(xml_file_path, ndjson_path, flattener, rows='records', compress=False, max_bytes=None,
+                  workers=None, backend=None, child_key=AUDIT_TRAIL, parent_keys=AUDIT_PARENT_KEYS, keep_empty=False):
+    """Flattens an XML file record by record into NDJSON in constant memory; returns the paths written.
+
+    workers flattens chunks of records in a process pool (see xml_parallel); rows are still
+    written in file order.
+    """
+    if workers:
+        records = iter_flatten_parallel(xml_file_path, flattener, workers, backend=backend)
+    else:
+        records = flattener.iter_file(xml_file_path, backend)
+    with NdjsonWriter(ndjson_path, compress, max_bytes) as writer:
+        writer.write_rows(iter_rows(records, rows, child_key, parent_keys, keep_empty))
+    return writer.paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Flatten an XML file straight to NDJSON.')
+    parser.add_argument('xml_file')
+    parser.add_argument('ndjson_file')
+    parser.add_argument('--key-policy', default='full', choices=sorted(KEY_POLICIES))
+    parser.add_argument('--rows', default='records', choices=ROW_MODES,
+                        help='One line per record, or one per AuditTrail entry with the record keys')
+    parser.add_argument('--keep-empty', action='store_true', help='With --rows audit, keep records without entries')
+    parser.add_argument('--gzip', action='store_true')
+    parser.add_argument('--max-mb', type=float, help='Roll over to a new file after this many uncompressed MB')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--backend', choices=('lxml', 'etree'))
+    args = parser.parse_args(argv)
+
+    max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb else None
+    paths = xml_to_ndjson(args.xml_file, args.ndjson_file, XmlFlattener(args.key_policy), args.rows, args.gzip,
+                          max_bytes, args.workers, args.backend, keep_empty=args.keep_empty)
+    print('\n'.join(paths))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,202 @@
+import codecs
+import logging
+import mmap
+import os
+import re
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from bounded_pool import imap_bounded
+from xml_backend import get_backend
+from xml_flatten import XmlFlattener
+
+RecordLayout = namedtuple('RecordLayout', ['prolog', 'epilog', 'starts', 'ends'])
+
+NAME_END = re.compile(rb'[\s/>]')
+MARKUP_IN_GAP = re.compile(rb'<!--.*?-->|<\?.*?\?>', re.DOTALL)
+XML_DECLARATION = re.compile(rb'(?:\xef\xbb\xbf)?<\?xml[^>]*?encoding\s*=\s*["\']([A-Za-z0-9._-]+)["\']')
+PRINTABLE_ASCII = bytes(range(0x20, 0x7F))
+# Encodings that pass the ASCII check but switch character sets with escape sequences
+STATEFUL_ENCODINGS = ('iso2022', 'utf-7', 'hz')
+
+
+def _at(data, position, prefix):
+    # mmap has no startswith/index
+    return data[position:position + len(prefix)] == prefix
+
+
+def _index(data, sub, position):
+    found = data.find(sub, position)
+    if found == -1:
+        raise ValueError(f'Unterminated markup at offset {position}')
+    return found
+
+
+def _tag_end(data, position):
+    """Offset just past the '>' closing the tag that starts at position (quoted attribute values may hold '>')."""
+    quote = None
+    end = len(data)
+    while position < end:
+        char = data[position]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in b'"\'':
+            quote = char
+        elif char == 0x3E:  # '>'
+            return position + 1
+        position += 1
+    raise ValueError('Unterminated tag')
+
+
+def _next_tag(data, position):
+    """Offset of the next start or end tag at or after position, skipping comments, PIs and DOCTYPE."""
+    while True:
+        position = data.find(b'<', position)
+        if position == -1:
+            return -1
+        if _at(data, position, b'<!--'):
+            position = _index(data, b'-->', position) + 3
+        elif _at(data, position, b'<?'):
+            position = _index(data, b'?>', position) + 2
+        elif _at(data, position, b'<!'):
+            bracket = data.find(b'[', position)
+            close = _index(data, b'>', position)
+            if bracket != -1 and bracket < close:
+                close = _index(data, b'>', _index(data, b']', bracket))
+            position = close + 1
+        else:
+            return position
+
+
+def _tag_name(data, position):
+    return data[position + 1:NAME_END.search(data, position + 1).start()]
+
+
+def _check_gap(data, start, end):
+    # Only whitespace, text, comments and PIs may sit between records; anything else would be a
+    # top-level element with another tag, which the scan below cannot see
+    gap = data[start:end]
+    if b'<' in gap and b'<' in MARKUP_IN_GAP.sub(b'', gap):
+        raise ValueError(f'Unexpected markup between records at offset {start}')
+
+
+def _check_encoding(data):
+    # The scan matches markup as ASCII bytes, so UTF-16/32, EBCDIC and the like cannot be split
+    if data[:2] in (b'\xff\xfe', b'\xfe\xff') or b'\x00' in data[:4]:
+        raise ValueError('UTF-16/32 XML cannot be split by the byte scan')
+    declaration = XML_DECLARATION.match(data, 0, 1024)
+    if declaration is None:
+        return
+    encoding = declaration.group(1).decode('ascii')
+    try:
+        name = codecs.lookup(encoding).name
+        compatible = PRINTABLE_ASCII.decode(name) == PRINTABLE_ASCII.decode('ascii')
+    except (LookupError, UnicodeDecodeError):
+        compatible = False
+    if not compatible or name.startswith(STATEFUL_ENCODINGS):
+        raise ValueError(f'XML encoding {encoding} is not ASCII-compatible')
+
+
+def record_layout(xml_file_path):
+    """Finds the byte range of every top-level record by scanning for the record tag only.
+
+    All children of the root must share one tag (the tag of the first child) and the file must
+    be in an ASCII-compatible encoding; otherwise ValueError is raised. Nested elements with the
+    record's own tag are balanced by depth counting; the tag must not appear inside comments or
+    CDATA within a record.
+    """
+    with open(xml_file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        _check_encoding(data)
+        root_start = _next_tag(data, 0)
+        root_end = _tag_end(data, root_start)
+        prolog = data[:root_end]
+        epilog = b'</' + _tag_name(data, root_start) + b'>'
+        starts = array('Q')
+        ends = array('Q')
+        if data[root_end - 2] == 0x2F:  # '/': empty root
+            return RecordLayout(prolog, b'', starts, ends)
+
+        first = _next_tag(data, root_end)
+        if _at(data, first, b'</'):
+            return RecordLayout(prolog, epilog, starts, ends)
+
+        record_tag = re.compile(rb'<(/?)' + re.escape(_tag_name(data, first)) + rb'(?=[\s/>])')
+        depth = 0
+        for match in record_tag.finditer(data, first):
+            position = match.start()
+            if match.group(1):
+                depth -= 1
+                if depth == 0:
+                    ends.append(_tag_end(data, position))
+                continue
+            tag_end = _tag_end(data, position)
+            if depth == 0:
+                _check_gap(data, ends[-1] if ends else root_end, position)
+                starts.append(position)
+            if data[tag_end - 2] != 0x2F:  # not self-closing
+                depth += 1
+            elif depth == 0:
+                ends.append(tag_end)
+        if depth:
+            raise ValueError(f'Unbalanced record tags in {xml_file_path}')
+        if ends:
+            _check_gap(data, ends[-1], data.rfind(epilog))
+    return RecordLayout(prolog, epilog, starts, ends)
+
+
+def _flatten_range(xml_file_path, options, backend, prolog, epilog, start, stop):
+    # Runs in a worker process: re-wraps a run of records in the original prolog and root tag
+    # (namespace declarations, encoding and entities included) and flattens them
+    with open(xml_file_path, 'rb') as f:
+        f.seek(start)
+        chunk = f.read(stop - start)
+    flattener = XmlFlattener(**options)
+    return [flattener.flatten(record) for record in get_backend(backend).fromstring(prolog + chunk + epilog)]
+
+
+def _flatten_file(xml_file_path, options, backend):
+    return XmlFlattener(**options).flatten_file(xml_file_path, backend)
+
+
+def iter_flatten_parallel(xml_file_path, flattener, workers=None, chunk_records=10000, backend=None, columns=None):
+    """Flattens one large XML file in a process pool, chunked at record boundaries; yields records in file order.
+
+    At most two chunks per worker are in flight. Files the byte scan cannot split (mixed record
+    tags, non-ASCII-compatible encodings) are flattened serially instead.
+    """
+    if columns is not None:
+        flattener = flattener.with_columns(columns)
+    try:
+        layout = record_layout(xml_file_path)
+    except ValueError as e:
+        logging.warning(f"Flattening {xml_file_path} serially: {e}")
+        yield from flattener.iter_file(xml_file_path, backend)
+        return
+    record_count = len(layout.starts)
+    first_records = range(0, record_count, chunk_records)
+    starts = [layout.starts[first] for first in first_records]
+    stops = [layout.ends[min(first + chunk_records, record_count) - 1] for first in first_records]
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for records in imap_bounded(
+            pool, _flatten_range, repeat(xml_file_path), repeat(flattener.options), repeat(backend),
+            repeat(layout.prolog), repeat(layout.epilog), starts, stops, window=2 * workers,
+        ):
+            yield from records
+
+
+def flatten_file_parallel(xml_file_path, flattener, workers=None, chunk_records=10000, backend=None, columns=None):
+    """Same output as flattener.flatten_file, with chunks of records flattened in a process pool."""
+    return list(iter_flatten_parallel(xml_file_path, flattener, workers, chunk_records, backend, columns))
+
+
+def flatten_files_parallel(xml_file_paths, flattener, workers=None, backend=None, columns=None):
+    """Flattens a batch of XML files concurrently, one file per task; returns one record list per file, in order."""
+    if columns is not None:
+        flattener = flattener.with_columns(columns)
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(imap_bounded(pool, _flatten_file, xml_file_paths, repeat(flattener.options), repeat(backend),
+                                 window=2 * workers))
@@ -0,0 +1,63 @@
+class _TrieNode:
+    __slots__ = ('children', 'accept', 'globstar')
+
+    def __init__(self, globstar=False):
+        self.children = {}
+        self.accept = False
+        self.globstar = globstar
+
+
+# Reached below an accepted path: everything underneath is wanted
+_EVERYTHING = _TrieNode(globstar=True)
+_EVERYTHING.accept = True
+
+
+class PathTrie:
+    """Compiled set of wanted column paths.
+
+    A path is a '/'-separated list of cleaned tags relative to the record element, e.g.
+    'GrpHdr/CreDtTm'. '*' matches any one tag, '**' any number of tags ('**/TxId'), and a path
+    naming a container selects everything below it. Matching runs the trie as a small NFA:
+    a state is a tuple of nodes, advanced one tag at a time.
+    """
+
+    def __init__(self, paths):
+        self.paths = tuple(paths)
+        self.root = _TrieNode()
+        for path in self.paths:
+            node = self.root
+            for part in path.strip('/').split('/'):
+                child = node.children.get(part)
+                if child is None:
+                    child = node.children[part] = _TrieNode(globstar=part == '**')
+                node = child
+            node.accept = True
+        self.start = self._closure([self.root])
+
+    @staticmethod
+    def _closure(nodes):
+        # A '**' node also matches zero tags, so it is active as soon as its parent is
+        state = []
+        for node in nodes:
+            while node is not None and node not in state:
+                state.append(node)
+                node = node.children.get('**')
+        return tuple(state)
+
+    def step(self, state, tag):
+        """State after descending into tag; an empty state means nothing below can be wanted."""
+        nodes = []
+        for node in state:
+            if node.globstar:
+                nodes.append(node)
+            for key in (tag, '*'):
+                child = node.children.get(key)
+                if child is not None:
+                    nodes.append(child)
+            if node.accept:
+                nodes.append(_EVERYTHING)
+        return self._closure(nodes)
+
+    @staticmethod
+    def accepts(state):
+        return any(node.accept for node in state)
@@ -0,0 +1,12 @@
+from xml_backend import get_backend
+
+
+def iter_record_elements(xml_file_path, backend=None, record_tag=None):
+    """Yields each top-level record element (child of the root) once it is fully parsed.
+
+    Built on iterparse: after the caller is done with a record it is cleared and
+    detached from the root, so memory stays flat however large the file is. backend is
+    'lxml' or 'etree' (default: lxml when installed); record_tag (Clark notation,
+    '{namespace}Tag') limits the records to one tag, which lxml filters in C.
+    """
+    return get_backend(backend).iter_record_elements(xml_file_path, record_tag)
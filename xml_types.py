@@ -0,0 +1,184 @@
+import logging
+import re
+import xml.etree.ElementTree as ET
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+XS = '{http://www.w3.org/2001/XMLSchema}'
+
+# ISO 20022 amounts: totalDigits 18, fractionDigits 5
+DEFAULT_DECIMAL = (18, 5)
+
+# Hand-written map for the payment files; keys are full column names or the last key part
+COLUMN_TYPES = {
+    'NbOfTxs': 'int',
+    'CtrlSum': 'decimal',
+    'InstdAmt': 'decimal',
+    'IntrBkSttlmAmt': 'decimal',
+    'CreDtTm': 'datetime',
+    'timestamp': 'datetime',
+}
+
+# XSD built-in type -> column type
+XSD_TYPES = {
+    'byte': 'int', 'short': 'int', 'int': 'int', 'integer': 'int', 'long': 'int',
+    'nonNegativeInteger': 'int', 'positiveInteger': 'int', 'nonPositiveInteger': 'int', 'negativeInteger': 'int',
+    'unsignedByte': 'int', 'unsignedShort': 'int', 'unsignedInt': 'int',
+    'decimal': 'decimal',
+    'float': 'float', 'double': 'float',
+    'dateTime': 'datetime',
+    'date': 'date',
+    'boolean': 'bool',
+}
+
+DECIMAL_SPEC = re.compile(r'decimal\((\d+),\s*(\d+)\)$')
+
+# Values not matching these become null instead of failing the whole column
+VALUE_PATTERNS = {
+    'int': r'^[+-]?\d{1,18}$',
+    'float': r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$|^[+-]?INF$|^NaN$',
+    'datetime': r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{1,6})?(Z|[+-]\d{2}:\d{2})?$',
+    'date': r'^\d{4}-\d{2}-\d{2}$',
+    'bool': r'^(true|false|1|0)$',
+}
+ZONED = r'(Z|[+-]\d{2}:\d{2})$'
+
+
+def parse_type(spec):
+    """'int' / 'float' / 'decimal' / 'decimal(p,s)' / 'datetime' / 'date' / 'bool' -> (kind, Arrow type)."""
+    if spec == 'int':
+        return 'int', pa.int64()
+    if spec == 'float':
+        return 'float', pa.float64()
+    if spec == 'decimal':
+        return 'decimal', pa.decimal128(*DEFAULT_DECIMAL)
+    match = DECIMAL_SPEC.match(spec)
+    if match:
+        return 'decimal', pa.decimal128(int(match.group(1)), int(match.group(2)))
+    if spec == 'datetime':
+        return 'datetime', pa.timestamp('us')
+    if spec == 'date':
+        return 'date', pa.date32()
+    if spec == 'bool':
+        return 'bool', pa.bool_()
+    raise ValueError(f'Unknown column type {spec}')
+
+
+def column_type(column, column_types, separator='_'):
+    """Type spec of a column: an exact match first, else one for its last key part; None keeps it a string."""
+    spec = column_types.get(column)
+    if spec is None and isinstance(column, str):
+        spec = column_types.get(column.rsplit(separator, 1)[-1])
+    return spec
+
+
+def _value_pattern(kind, arrow_type):
+    if kind != 'decimal':
+        return VALUE_PATTERNS[kind]
+    # At most precision - scale integer digits and scale fraction digits, so the cast never rescales
+    digits = arrow_type.precision - arrow_type.scale
+    integer = rf'\d{{1,{digits}}}' if digits else '0'
+    if not arrow_type.scale:
+        return rf'^[+-]?{integer}$'
+    return rf'^[+-]?({integer}(\.\d{{0,{arrow_type.scale}}})?|\.\d{{1,{arrow_type.scale}}})$'
+
+
+def convert_column(values, spec, name=''):
+    """Converts a whole column of strings (None for missing) to an Arrow array of the spec'd type.
+
+    Values are validated and cast in bulk by Arrow compute kernels; values that do not parse
+    become null (counted in a warning). Datetimes with a zone offset are converted to UTC, so
+    the column is one naive timestamp type either way.
+    """
+    kind, arrow_type = parse_type(spec)
+    array = values if isinstance(values, (pa.Array, pa.ChunkedArray)) else pa.array(values, pa.string())
+
+    valid = pc.match_substring_regex(array, _value_pattern(kind, arrow_type))
+    invalid = pc.sum(pc.and_(pc.invert(valid), pc.is_valid(array))).as_py() or 0
+    if invalid:
+        logging.warning(f"{invalid} value(s) of column {name} are not {spec}; stored as null")
+    array = pc.if_else(valid, array, pa.scalar(None, pa.string()))
+
+    if kind == 'int':
+        return pc.cast(pc.replace_substring_regex(array, r'^\+', ''), arrow_type)
+    if kind == 'datetime':
+        zoned = pc.fill_null(pc.match_substring_regex(array, ZONED), False)
+        local = pc.cast(pc.if_else(zoned, pa.scalar(None, pa.string()), array), arrow_type)
+        utc = pc.cast(pc.cast(pc.if_else(zoned, array, pa.scalar(None, pa.string())), pa.timestamp('us', 'UTC')),
+                      arrow_type)
+        return pc.if_else(zoned, utc, local)
+    return pc.cast(array, arrow_type)
+
+
+def typed_columns(columns, column_types, separator='_'):
+    """{column: values} -> {column: Arrow array}: typed columns are converted, the rest become string arrays."""
+    arrays = {}
+    for column, values in columns.items():
+        spec = column_type(column, column_types, separator)
+        arrays[column] = pa.array(values) if spec is None else convert_column(values, spec, column)
+    return arrays
+
+
+def _local(name):
+    # 'xs:decimal' / '{ns}decimal' -> 'decimal'
+    return name.rsplit(':', 1)[-1].rsplit('}', 1)[-1] if name else None
+
+
+def _digits(restriction):
+    total = restriction.find(f'{XS}totalDigits')
+    fraction = restriction.find(f'{XS}fractionDigits')
+    return (total.get('value') if total is not None else None,
+            fraction.get('value') if fraction is not None else None)
+
+
+def column_types_from_xsd(xsd_path):
+    """Infers a column -> type map from the leaf elements of an XSD.
+
+    Named simple types are followed down their restriction/extension bases to a built-in type;
+    decimals keep their totalDigits/fractionDigits. Element names declared with conflicting
+    types are left out (they stay strings).
+    """
+    schema = ET.parse(xsd_path).getroot()
+
+    bases = {}  # named type -> (base type name, totalDigits, fractionDigits)
+    for node in schema.iter():
+        if node.tag not in (f'{XS}simpleType', f'{XS}complexType') or not node.get('name'):
+            continue
+        derivation = next((child for child in node.iter() if child.tag in (f'{XS}restriction', f'{XS}extension')),
+                          None)
+        if derivation is None or (node.tag == f'{XS}complexType' and node.find(f'{XS}simpleContent') is None):
+            continue
+        bases[node.get('name')] = (_local(derivation.get('base')),) + _digits(derivation)
+
+    def resolve(type_name, total=None, fraction=None, seen=()):
+        if type_name in bases and type_name not in seen:
+            base, type_total, type_fraction = bases[type_name]
+            return resolve(base, total or type_total, fraction or type_fraction, seen + (type_name,))
+        kind = XSD_TYPES.get(type_name)
+        if kind == 'decimal' and (total or fraction):
+            return f'decimal({total or DEFAULT_DECIMAL[0]},{fraction or 0})'
+        return kind
+
+    column_types = {}
+    conflicts = set()
+    for element in schema.iter(f'{XS}element'):
+        name = element.get('name')
+        if not name:
+            continue
+        if element.get('type'):
+            spec = resolve(_local(element.get('type')))
+        else:
+            inline = element.find(f'{XS}simpleType/{XS}restriction')
+            if inline is None:
+                continue
+            spec = resolve(_local(inline.get('base')), *_digits(inline))
+        if spec is None:
+            continue
+        if column_types.setdefault(name, spec) != spec:
+            conflicts.add(name)
+
+    for name in conflicts:
+        logging.warning(f"Element {name} has conflicting types in {xsd_path}; keeping it a string")
+        del column_types[name]
+    return column_types